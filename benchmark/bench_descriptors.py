@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Microbenchmark of the OpenSwitch attribute descriptors.
+
+Compares reading an attribute declared in ``_class_openswitch_attributes``
+through the descriptors generated by the OpenSwitch metaclass, with and
+without lint mode, with the ``property`` based implementation they replaced.
+
+Run it with::
+
+    python benchmark/bench_descriptors.py
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from timeit import repeat
+
+from topology_openswitch.openswitch import OpenSwitchBase
+
+
+def legacy_property(attr, docstring):
+    """
+    Build the ``property`` that the OpenSwitch metaclass used to generate.
+    """
+
+    def getter(salf):
+        if attr not in salf._attribute_record:
+            salf._attribute_record.add(attr)
+
+        return getattr(salf, '_{}'.format(attr))
+
+    def setter(salf, value):
+        setattr(salf, '_{}'.format(attr), value)
+
+    def deleter(salf):
+        delattr(salf, '_{}'.format(attr))
+
+    return property(getter, setter, deleter, docstring)
+
+
+def node_class(name, lint):
+    """
+    Create a concrete OpenSwitch node class with two attributes.
+    """
+
+    def initialize(self):
+        OpenSwitchBase.__init__(self)
+        self._ports = {}
+        self._identifier = name
+
+    return type(OpenSwitchBase)(
+        str(name), (OpenSwitchBase, ), {
+            '_openswitch_lint': lint,
+            '_class_openswitch_attributes': {
+                'ports': 'ports doc',
+                'identifier': 'identifier doc'
+            },
+            '__init__': initialize
+        }
+    )
+
+
+DescriptorNode = node_class('DescriptorNode', False)
+TrackedDescriptorNode = node_class('TrackedDescriptorNode', True)
+PropertyNode = node_class('PropertyNode', True)
+
+for attribute, docstring in PropertyNode._class_openswitch_attributes.items():
+    setattr(PropertyNode, attribute, legacy_property(attribute, docstring))
+
+
+def measure(node, number=1000000, repetitions=5):
+    """
+    Measure the best time of ``number`` reads of ``node.identifier``.
+
+    :rtype: float
+    :return: Nanoseconds per read
+    """
+    return min(
+        repeat('node.identifier', globals={'node': node}, number=number,
+               repeat=repetitions)
+    ) / number * 1e9
+
+
+def main():
+    legacy = measure(PropertyNode())
+    tracked = measure(TrackedDescriptorNode())
+    untracked = measure(DescriptorNode())
+
+    print('property read:             {:8.1f} ns'.format(legacy))
+    print('tracked descriptor read:   {:8.1f} ns ({:.2f}x)'.format(
+        tracked, legacy / tracked
+    ))
+    print('untracked descriptor read: {:8.1f} ns ({:.2f}x)'.format(
+        untracked, legacy / untracked
+    ))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Memory benchmark of the OpenSwitch node layouts.
+
+Compares the memory used by each instance and the time it takes to create it
+for the default layout and the compact layout, with and without lint mode.
+In lint mode every attribute is read once, so the usage record is full.
+
+The node classes inherit only from ``OpenSwitchBase``, so the instances of
+the compact layout still have a ``__dict__``, as real nodes do.
+
+Run it with::
+
+    python benchmark/bench_memory.py
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from gc import collect, disable, enable
+from timeit import default_timer
+from tracemalloc import start, stop, take_snapshot
+
+from topology_openswitch.openswitch import OpenSwitchBase
+
+ATTRIBUTES = 16
+
+NODES = 10000
+
+REPETITIONS = 5
+
+
+def node_class(name, lint, compact):
+    """
+    Create a concrete OpenSwitch node class with ``ATTRIBUTES`` attributes.
+    """
+    attributes = [
+        'attribute_{}'.format(number) for number in range(ATTRIBUTES)
+    ]
+
+    def initialize(self):
+        OpenSwitchBase.__init__(self)
+        for attribute in attributes:
+            setattr(self, attribute, attribute)
+
+    return type(OpenSwitchBase)(
+        str(name), (OpenSwitchBase, ), {
+            '_openswitch_lint': lint,
+            '_openswitch_compact': compact,
+            '_class_openswitch_attributes': {
+                attribute: '{} doc'.format(attribute)
+                for attribute in attributes
+            },
+            '__init__': initialize
+        }
+    )
+
+
+def measure(node_class):
+    """
+    Measure the memory and creation time of ``NODES`` instances.
+
+    :rtype: tuple
+    :return: Bytes and microseconds per instance
+    """
+    # The best of several runs is taken, with the garbage collector disabled
+    # while timing, like timeit does
+    elapsed = None
+
+    for _ in range(REPETITIONS):
+        collect()
+        disable()
+        begin = default_timer()
+        nodes = [node_class() for _ in range(NODES)]
+        end = default_timer()
+        enable()
+
+        del nodes
+
+        if elapsed is None or end - begin < elapsed:
+            elapsed = end - begin
+
+    collect()
+
+    start()
+    before = take_snapshot()
+
+    nodes = [node_class() for _ in range(NODES)]
+
+    if node_class._attribute_tracking:
+        for node in nodes:
+            for attribute in node_class._class_openswitch_attributes:
+                getattr(node, attribute)
+
+    after = take_snapshot()
+    stop()
+
+    size = sum(
+        stat.size_diff for stat in after.compare_to(before, 'filename')
+    )
+
+    return size / NODES, elapsed / NODES * 1e6
+
+
+def main():
+    print('{:<16} {:>12} {:>12}'.format('layout', 'bytes/node', 'us/node'))
+
+    for name, lint, compact in (
+        ('default', False, False),
+        ('default lint', True, False),
+        ('compact', False, True),
+        ('compact lint', True, True),
+    ):
+        size, elapsed = measure(node_class(name.replace(' ', '_'), lint,
+                                           compact))
+        print('{:<16} {:>12.1f} {:>12.2f}'.format(name, size, elapsed))
+
+
+if __name__ == '__main__':
+    main()
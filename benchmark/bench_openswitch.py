@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Benchmark suite of the OpenSwitchBase attribute machinery.
+
+Builds synthetic node hierarchies of a given width and depth and measures:
+
+- class creation through the OpenSwitch metaclass
+- instance construction
+- reads of OpenSwitch attributes
+- ``__getattr__`` misses of names that no class defines
+- ``WrongAttributeError`` raising for names defined in a sibling class
+- ``_find_class`` and the ``AttributeUsageCollector`` analysis
+
+Every scenario is measured with and without lint mode. The results can be
+saved as JSON and compared with a previous run to catch regressions:
+
+::
+
+    python benchmark/bench_openswitch.py --json before.json
+    # Change the openswitch module
+    python benchmark/bench_openswitch.py --compare before.json
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from gc import collect
+from sys import exit
+from json import dump, load
+from timeit import Timer
+from argparse import ArgumentParser
+from collections import OrderedDict
+
+from topology_openswitch.openswitch import (
+    OpenSwitchBase, WrongAttributeError, AttributeUsageCollector,
+    LINT_COLLECTOR, _MetaOpenSwitch
+)
+
+# Width and depth of the synthetic hierarchies. The first one is similar to
+# the hierarchy in test/test_topology_openswitch.py, the last one has several
+# hundred classes.
+HIERARCHIES = [(2, 3), (4, 3), (8, 3)]
+
+# Number of OpenSwitch attributes declared by each class
+ATTRIBUTES = 2
+
+REPETITIONS = 5
+
+
+def build_hierarchy(width, depth, lint):
+    """
+    Build a hierarchy of OpenSwitch node classes.
+
+    The root of the hierarchy is abstract, every other class has ``width``
+    subclasses down to ``depth`` levels and declares ``ATTRIBUTES`` attributes.
+
+    :rtype: list
+    :return: The concrete classes of the hierarchy, in creation order
+    """
+    metaclass = type(OpenSwitchBase)
+
+    def initialize(self):
+        OpenSwitchBase.__init__(self)
+        for attribute in self._benchmark_attributes:
+            setattr(self, '_{}'.format(attribute), attribute)
+
+    root = metaclass(
+        str('Root'), (OpenSwitchBase, ), {
+            '_openswitch_lint': lint, '_benchmark_attributes': ()
+        }
+    )
+
+    classes = []
+    level = [root]
+
+    for current_depth in range(depth):
+        next_level = []
+
+        for parent in level:
+            for number in range(width):
+                name = '{}_{}'.format(
+                    parent.__name__.replace('Root', 'Node'), number
+                )
+                attributes = OrderedDict(
+                    ('{}_{}'.format(name.lower(), attribute), 'doc')
+                    for attribute in range(ATTRIBUTES)
+                )
+                subclass = metaclass(
+                    str(name), (parent, ), {
+                        '_class_openswitch_attributes': attributes,
+                        '_benchmark_attributes': (
+                            parent._benchmark_attributes + tuple(attributes)
+                        ),
+                        'identifier': name,
+                        '__init__': initialize
+                    }
+                )
+                next_level.append(subclass)
+
+        classes.extend(next_level)
+        level = next_level
+
+    return classes
+
+
+def best(function, number):
+    """
+    Get the best time of ``REPETITIONS`` runs of ``number`` calls.
+
+    :rtype: float
+    :return: Nanoseconds per call
+    """
+    return min(
+        Timer(function).repeat(repeat=REPETITIONS, number=number)
+    ) / number * 1e9
+
+
+def run_scenario(width, depth, lint):
+    """
+    Measure all the metrics for a hierarchy.
+
+    :rtype: OrderedDict
+    :return: Nanoseconds per operation for each metric
+    """
+    results = OrderedDict()
+
+    classes = build_hierarchy(width, depth, lint)
+
+    results['class_creation'] = best(
+        lambda: build_hierarchy(width, depth, lint), 1
+    ) / len(classes)
+
+    # Discard the hierarchies created while measuring the class creation
+    collect()
+
+    leaf = classes[-1]
+    sibling = classes[-2]
+    node = leaf()
+    attribute = leaf._benchmark_attributes[-1]
+    sibling_attribute = sibling._benchmark_attributes[-1]
+
+    results['instance_construction'] = best(leaf, 1000)
+
+    results['attribute_read'] = best(lambda: getattr(node, attribute), 100000)
+
+    results['getattr_miss'] = best(
+        lambda: hasattr(node, 'missing_attribute'), 10000
+    )
+
+    def wrong_attribute():
+        try:
+            getattr(node, sibling_attribute)
+        except WrongAttributeError:
+            pass
+
+    results['wrong_attribute_error'] = best(wrong_attribute, 10000)
+
+    used = frozenset(classes[0]._benchmark_attributes)
+
+    def find_class_cold():
+        _MetaOpenSwitch._found_classes.clear()
+        leaf._find_class(used)
+
+    results['find_class_cold'] = best(find_class_cold, 1000)
+    results['find_class'] = best(lambda: leaf._find_class(used), 10000)
+
+    nodes = [subclass() for subclass in classes]
+
+    def analyze():
+        collector = AttributeUsageCollector()
+        collector.collect(nodes)
+        collector.analyze()
+
+    results['collector_analysis'] = best(analyze, 10) / len(nodes)
+
+    return results
+
+
+def run():
+    """
+    Run all the scenarios.
+
+    :rtype: OrderedDict
+    :return: The results of each scenario, keyed by scenario name
+    """
+    results = OrderedDict()
+
+    for width, depth in HIERARCHIES:
+        for lint in (False, True):
+            name = 'width={} depth={}{}'.format(
+                width, depth, ' lint' if lint else ''
+            )
+            results[name] = run_scenario(width, depth, lint)
+            collect()
+
+            # The synthetic nodes do not belong to a topology to report
+            LINT_COLLECTOR.clear()
+
+    return results
+
+
+def report(results, baseline=None, threshold=1.25):
+    """
+    Print the results, compared with a baseline if given.
+
+    :rtype: bool
+    :return: True if any metric is slower than the baseline by more than the
+     threshold ratio
+    """
+    regression = False
+
+    for scenario, metrics in results.items():
+        print(scenario)
+
+        for metric, value in metrics.items():
+            line = '    {:<24} {:>12.1f} ns'.format(metric, value)
+
+            if baseline is not None and metric in baseline.get(scenario, {}):
+                ratio = value / baseline[scenario][metric]
+                line = '{} {:>8.2f}x'.format(line, ratio)
+
+                if ratio > threshold:
+                    regression = True
+                    line = '{} REGRESSION'.format(line)
+
+            print(line)
+
+    return regression
+
+
+def main():
+    parser = ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--json', help='Save the results to this file')
+    parser.add_argument(
+        '--compare', help='Compare the results with this saved run'
+    )
+    parser.add_argument(
+        '--threshold', type=float, default=1.25,
+        help='Slowdown ratio reported as a regression'
+    )
+    args = parser.parse_args()
+
+    results = run()
+
+    baseline = None
+
+    if args.compare:
+        with open(args.compare) as fd:
+            baseline = load(fd)
+
+    regression = report(results, baseline, args.threshold)
+
+    if args.json:
+        with open(args.json, 'w') as fd:
+            dump(results, fd, indent=4)
+
+    exit(1 if regression else 0)
+
+
+if __name__ == '__main__':
+    main()
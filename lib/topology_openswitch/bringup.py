@@ -0,0 +1,128 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+topology_openswitch vtysh bring up module
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import monotonic
+from logging import getLogger
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from topology_openswitch.vtysh import VtyshShellMixin
+
+log = getLogger(__name__)
+
+# Result of the vtysh bring up of a connection: the node identifier, the shell
+# and connection names, the seconds it took, the VtyshReadiness of the
+# connection and the exception raised, if any.
+BringUpResult = namedtuple(
+    'BringUpResult', [
+        'node', 'shell', 'connection', 'elapsed', 'readiness', 'error'
+    ]
+)
+
+
+def _bring_up_connection(node, shell_name, shell, connection):
+    """
+    Connect a vtysh shell, negotiating its prompt.
+
+    Connections that are already connected are left untouched.
+
+    :rtype: BringUpResult
+    """
+    start = monotonic()
+    error = None
+
+    try:
+        try:
+            connected = shell.is_connected(connection=connection)
+        except Exception:
+            connected = False
+
+        if not connected:
+            shell.connect(connection=connection)
+
+    except Exception as exception:
+        error = exception
+        log.warning(
+            'Unable to bring up vtysh in connection {} of shell {} of node '
+            '{}: {}'.format(connection, shell_name, node.identifier, error)
+        )
+
+    return BringUpResult(
+        node.identifier, shell_name, connection, monotonic() - start,
+        shell.get_readiness(connection), error
+    )
+
+
+def bring_up_vtysh(nodes, connections=None, max_workers=None):
+    """
+    Start vtysh in all the connections of all the nodes concurrently.
+
+    Every shell of the nodes that uses :class:`VtyshShellMixin` is connected,
+    which starts vtysh and negotiates its prompt, in a pool of threads. Each
+    connection runs in its own thread, so a slow node does not delay the
+    others.
+
+    :param nodes: An iterable of engine nodes
+    :param list connections: Names of the connections to bring up in every
+     shell. If not given, the existing connections of each shell are brought
+     up, or the default one if there are none.
+    :param int max_workers: Maximum number of threads, one per connection if
+     not given
+    :rtype: OrderedDict
+    :return: A list of :class:`BringUpResult` for each node identifier
+    """
+    tasks = []
+
+    for node in nodes:
+        for shell_name in node.available_shells():
+            shell = node.get_shell(shell_name)
+
+            if not isinstance(shell, VtyshShellMixin):
+                continue
+
+            for connection in (
+                connections or list(shell._connections.keys()) or ['0']
+            ):
+                tasks.append((node, shell_name, shell, connection))
+
+    results = OrderedDict()
+
+    if not tasks:
+        return results
+
+    with ThreadPoolExecutor(
+        max_workers=max_workers or len(tasks)
+    ) as executor:
+        futures = [
+            executor.submit(_bring_up_connection, *task) for task in tasks
+        ]
+
+        for future in futures:
+            result = future.result()
+            results.setdefault(result.node, []).append(result)
+
+    return results
+
+
+__all__ = ['BringUpResult', 'bring_up_vtysh']
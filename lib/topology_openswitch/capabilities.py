@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+topology_openswitch image capabilities module
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from os import environ, replace
+from os.path import exists
+from json import dump, load
+from threading import Lock
+from logging import getLogger
+
+log = getLogger(__name__)
+
+# Name of the environment variable with the path of the file where the
+# capabilities of the images are kept between runs
+CAPABILITIES_ENVIRONMENT_VARIABLE = 'TOPOLOGY_OPENSWITCH_CAPABILITIES'
+
+
+class CapabilityCache(object):
+    """
+    Cache of the capabilities of OpenSwitch images.
+
+    Capabilities, like the support of the vtysh ``set prompt`` command, are
+    kept by image identifier so they are probed only once for all the nodes
+    that run the same image. If a path is given, the capabilities are loaded
+    from and saved to that JSON file, so they are also kept between runs.
+    Remove the file to probe the images again.
+
+    :param str path: Path of the JSON file of the cache
+    """
+
+    def __init__(self, path=None):
+        self._path = path
+        self._capabilities = None
+        self._lock = Lock()
+
+    def _load(self):
+        """
+        Load the capabilities from the file of the cache, if any.
+        """
+        if self._capabilities is not None:
+            return
+
+        self._capabilities = {}
+
+        if self._path is None or not exists(self._path):
+            return
+
+        try:
+            with open(self._path) as fd:
+                self._capabilities.update(load(fd))
+        except Exception as error:
+            log.warning(
+                'Unable to load the capabilities cache {}: {}'.format(
+                    self._path, error
+                )
+            )
+
+    def _save(self):
+        """
+        Save the capabilities to the file of the cache, if any.
+        """
+        if self._path is None:
+            return
+
+        temporary = '{}.tmp'.format(self._path)
+
+        try:
+            with open(temporary, 'w') as fd:
+                dump(self._capabilities, fd, indent=4, sort_keys=True)
+            replace(temporary, self._path)
+        except Exception as error:
+            log.warning(
+                'Unable to save the capabilities cache {}: {}'.format(
+                    self._path, error
+                )
+            )
+
+    def get(self, image, capability):
+        """
+        Get a capability of an image.
+
+        :param str image: Identifier of the image
+        :param str capability: Name of the capability
+        :return: The value of the capability or None if it is unknown
+        """
+        with self._lock:
+            self._load()
+            return self._capabilities.get(image, {}).get(capability)
+
+    def set(self, image, capability, value):
+        """
+        Set a capability of an image.
+
+        :param str image: Identifier of the image
+        :param str capability: Name of the capability
+        :param value: Value of the capability, it must be serializable to JSON
+        """
+        with self._lock:
+            self._load()
+
+            if self._capabilities.get(image, {}).get(capability) == value:
+                return
+
+            self._capabilities.setdefault(image, {})[capability] = value
+            self._save()
+
+    def clear(self):
+        """
+        Forget all the capabilities, in memory and in the file of the cache.
+        """
+        with self._lock:
+            self._capabilities = {}
+            self._save()
+
+
+CAPABILITY_CACHE = CapabilityCache(
+    environ.get(CAPABILITIES_ENVIRONMENT_VARIABLE)
+)
+
+
+__all__ = [
+    'CAPABILITIES_ENVIRONMENT_VARIABLE', 'CapabilityCache', 'CAPABILITY_CACHE'
+]
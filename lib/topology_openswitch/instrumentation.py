@@ -0,0 +1,377 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+topology_openswitch vtysh instrumentation module
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import time, monotonic
+from json import dump
+from bisect import bisect_left
+from threading import Lock
+from collections import namedtuple, OrderedDict
+
+# Upper bounds in seconds of the buckets of the latency histograms, one more
+# bucket counts the values above the last bound
+BUCKETS = (
+    0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 30, 60
+)
+
+# Metrics of a command sent to a vtysh shell: the node identifier, the
+# connection name, the command, the time it was sent since the epoch, the
+# seconds until the first byte of output and until the prompt matched, the
+# number of bytes received, the index of the match and if crash detection ran.
+CommandRecord = namedtuple(
+    'CommandRecord', [
+        'node', 'connection', 'command', 'sent', 'time_to_first_byte',
+        'time_to_prompt', 'bytes_received', 'index', 'crash_checked'
+    ]
+)
+
+
+class _Histogram(object):
+    """
+    Histogram of latencies with fixed buckets.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def add(self, value):
+        """
+        Add a value to the histogram.
+
+        :param float value: Seconds
+        """
+        self.count += 1
+        self.total += value
+        self.minimum = value if self.minimum is None else min(
+            self.minimum, value
+        )
+        self.maximum = value if self.maximum is None else max(
+            self.maximum, value
+        )
+        self.buckets[bisect_left(BUCKETS, value)] += 1
+
+    def as_dict(self):
+        """
+        Get the histogram as a dictionary that can be serialized to JSON.
+
+        :rtype: OrderedDict
+        """
+        return OrderedDict([
+            ('count', self.count),
+            ('total', self.total),
+            ('min', self.minimum),
+            ('max', self.maximum),
+            ('buckets', OrderedDict(
+                (
+                    '{:g}'.format(bound) if bound is not None else '+inf',
+                    count
+                )
+                for bound, count in zip(BUCKETS + (None, ), self.buckets)
+            )),
+        ])
+
+
+class _Metrics(object):
+    """
+    Aggregated metrics of a group of commands.
+    """
+
+    def __init__(self):
+        self.commands = 0
+        self.bytes_received = 0
+        self.crash_checks = 0
+        self.time_to_first_byte = _Histogram()
+        self.time_to_prompt = _Histogram()
+
+    def add(self, record):
+        """
+        :param CommandRecord record: The metrics of a command
+        """
+        self.commands += 1
+        self.bytes_received += record.bytes_received
+        self.crash_checks += record.crash_checked
+
+        if record.time_to_first_byte is not None:
+            self.time_to_first_byte.add(record.time_to_first_byte)
+
+        if record.time_to_prompt is not None:
+            self.time_to_prompt.add(record.time_to_prompt)
+
+    def as_dict(self):
+        """
+        :rtype: OrderedDict
+        """
+        return OrderedDict([
+            ('commands', self.commands),
+            ('bytes_received', self.bytes_received),
+            ('crash_checks', self.crash_checks),
+            ('time_to_first_byte', self.time_to_first_byte.as_dict()),
+            ('time_to_prompt', self.time_to_prompt.as_dict()),
+        ])
+
+
+class _ReadProbe(object):
+    """
+    File-like object that notes the output read by a spawn.
+
+    It is set as the ``logfile_read`` of the spawn while a command runs and
+    writes everything to the previous one.
+    """
+
+    def __init__(self, logfile):
+        self.logfile = logfile
+        self.first_byte = None
+        self.bytes_received = 0
+
+    def write(self, data):
+        if self.first_byte is None:
+            self.first_byte = monotonic()
+
+        self.bytes_received += len(data)
+
+        if self.logfile is not None:
+            self.logfile.write(data)
+
+    def flush(self):
+        if self.logfile is not None:
+            self.logfile.flush()
+
+
+class VtyshInstrumentation(object):
+    """
+    Collector of the latency of the commands sent to vtysh shells.
+
+    Shells are instrumented with :meth:`attach`, which wraps the
+    ``send_command`` method of the shell instance. The commands sent in
+    batches with ``send_commands`` or streamed with ``stream_command`` are
+    recorded by the shell itself. Shells that are not attached are not
+    affected at all. The start up metrics of vtysh, like the
+    spawn and ``set prompt`` retries, are collected for attached shells when
+    they connect.
+
+    ::
+
+        instrumentation = VtyshInstrumentation()
+
+        for node in mgr.nodes.values():
+            instrumentation.attach(node.get_shell('vtysh'))
+
+        # Run the test
+
+        instrumentation.dump('vtysh_metrics.json')
+
+    :param bool keep_records: Keep the :class:`CommandRecord` of every
+     command in ``records``, only aggregated metrics are kept if False
+    """
+
+    def __init__(self, keep_records=False):
+        self.records = [] if keep_records else None
+        self._lock = Lock()
+        self._nodes = OrderedDict()
+        self._commands = OrderedDict()
+        self._readiness = []
+        self._crash_checks = set()
+
+    def attach(self, shell, node=None):
+        """
+        Instrument a vtysh shell.
+
+        :param shell: A shell that uses :class:`VtyshShellMixin`
+        :param str node: Identifier of the node of the shell, the one of the
+         shell if not given
+        """
+        if node is None:
+            node = getattr(shell, '_node_identifier', None)
+
+        send_command = shell.send_command
+
+        def instrumented_send_command(
+            command, matches=None, newline=True, timeout=None,
+            connection=None, silent=False, **kwargs
+        ):
+            try:
+                spawn = shell._get_connection(connection)
+            except Exception:
+                spawn = None
+
+            key = (id(shell), shell._get_connection_name(connection))
+            self._crash_checks.discard(key)
+
+            probe = None
+
+            if spawn is not None:
+                probe = _ReadProbe(spawn.logfile_read)
+                spawn.logfile_read = probe
+
+            sent = time()
+            start = monotonic()
+            index = None
+
+            try:
+                index = send_command(
+                    command, matches=matches, newline=newline,
+                    timeout=timeout, connection=connection, silent=silent,
+                    **kwargs
+                )
+                return index
+
+            finally:
+                end = monotonic()
+
+                if probe is not None:
+                    spawn.logfile_read = probe.logfile
+
+                self.record_command(CommandRecord(
+                    node, shell._get_connection_name(connection), command,
+                    sent,
+                    None if probe is None or probe.first_byte is None
+                    else probe.first_byte - start,
+                    end - start if index is not None else None,
+                    0 if probe is None else probe.bytes_received,
+                    index,
+                    key in self._crash_checks
+                ))
+
+        shell.send_command = instrumented_send_command
+        shell._instrumentation = self
+        shell._instrumentation_node = node
+
+    def detach(self, shell):
+        """
+        Remove the instrumentation of a shell.
+
+        :param shell: A shell instrumented with :meth:`attach`
+        """
+        for attribute in (
+            'send_command', '_instrumentation', '_instrumentation_node'
+        ):
+            shell.__dict__.pop(attribute, None)
+
+    def record_command(self, record):
+        """
+        Add the metrics of a command.
+
+        :param CommandRecord record: The metrics of the command
+        """
+        with self._lock:
+            if self.records is not None:
+                self.records.append(record)
+
+            for metrics, key in (
+                (self._nodes, record.node), (self._commands, record.command)
+            ):
+                if key not in metrics:
+                    metrics[key] = _Metrics()
+                metrics[key].add(record)
+
+    def record_response(
+        self, shell, connection, command, sent, time_to_first_byte,
+        time_to_prompt, bytes_received, index, crash_checked
+    ):
+        """
+        Add the metrics of a command that was not sent with ``send_command``.
+
+        The vtysh shell calls this for each response of a batch of commands
+        and for each streamed command, which do not go through the wrapper
+        of :meth:`attach`.
+
+        :param shell: The instrumented shell
+        :param str connection: Name of the connection
+        :param str command: The command
+        :param float sent: Time the command was sent since the epoch
+        :param float time_to_first_byte: Seconds until the first byte of
+         output, None if unknown
+        :param float time_to_prompt: Seconds until the prompt matched, None if
+         it did not
+        :param int bytes_received: Number of bytes of the response
+        :param int index: Index of the match, None if nothing matched
+        :param bool crash_checked: If crash detection ran for the command
+        """
+        self.record_command(CommandRecord(
+            getattr(shell, '_instrumentation_node', None),
+            shell._get_connection_name(connection), command, sent,
+            time_to_first_byte, time_to_prompt, bytes_received, index,
+            crash_checked
+        ))
+
+    def record_crash_check(self, shell, connection=None):
+        """
+        Note that crash detection ran for the current command of a connection.
+
+        :param shell: The instrumented shell
+        :param str connection: Name of the connection
+        """
+        self._crash_checks.add(
+            (id(shell), shell._get_connection_name(connection))
+        )
+
+    def record_readiness(self, shell, connection, readiness):
+        """
+        Add the metrics of the start up of vtysh in a connection.
+
+        :param shell: The instrumented shell
+        :param str connection: Name of the connection
+        :param VtyshReadiness readiness: The metrics of the connection
+        """
+        with self._lock:
+            self._readiness.append(OrderedDict([
+                ('node', getattr(shell, '_instrumentation_node', None)),
+                ('connection', shell._get_connection_name(connection)),
+            ] + list(readiness._asdict().items())))
+
+    def as_dict(self):
+        """
+        Get all the collected metrics.
+
+        :rtype: OrderedDict
+        :return: The metrics by node and by command, and the start up metrics
+         of each connection. Nodes without identifier are keyed by ``null``.
+        """
+        with self._lock:
+            return OrderedDict([
+                ('nodes', OrderedDict(
+                    (node, metrics.as_dict())
+                    for node, metrics in self._nodes.items()
+                )),
+                ('commands', OrderedDict(
+                    (command, metrics.as_dict())
+                    for command, metrics in self._commands.items()
+                )),
+                ('readiness', list(self._readiness)),
+            ])
+
+    def dump(self, path):
+        """
+        Save all the collected metrics to a JSON file.
+
+        :param str path: Path of the file
+        """
+        with open(path, 'w') as fd:
+            dump(self.as_dict(), fd, indent=4)
+
+
+__all__ = ['BUCKETS', 'CommandRecord', 'VtyshInstrumentation']
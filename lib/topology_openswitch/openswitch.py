@@ -22,11 +22,25 @@ topology_openswitch node module
 from __future__ import unicode_literals, absolute_import
 from __future__ import print_function, division
 
+from os import environ
+from json import dumps
+from atexit import register
 from abc import ABCMeta, abstractmethod
+from types import MemberDescriptorType
+from collections import OrderedDict
 from warnings import warn
+from weakref import ref, WeakKeyDictionary
 
 from six import add_metaclass
 
+# Attribute usage tracking (lint mode) is disabled unless this environment
+# variable is set to a true value or the node class sets _openswitch_lint.
+LINT_ENVIRONMENT_VARIABLE = 'TOPOLOGY_OPENSWITCH_LINT'
+
+LINT = environ.get(LINT_ENVIRONMENT_VARIABLE, '').lower() in (
+    '1', 'true', 'yes', 'on'
+)
+
 
 class WrongAttributeError(Exception):
     """
@@ -34,44 +48,40 @@ class WrongAttributeError(Exception):
 
     This exception will be raised when an attempt is done to access an
     attribute that is not present in the object but is present in other class
-    that is child of OpenSwitch.
+    that is child of OpenSwitch. The message of the exception is rendered
+    only when it is first needed and then cached.
 
     :param str attribute: Attribute that was not found
     :param class lacking_class: Class that was missing the attribute
-    :param list having_classes: List of concrete classes names that have the
-     attribute
+    :param tuple having_classes: Concrete classes that have the attribute
     """
 
     def __init__(self, attribute, lacking_class, having_classes):
         self._attribute = attribute
         self._lacking_class = lacking_class
         self._having_classes = having_classes
+        self._message = None
         super(WrongAttributeError, self).__init__()
 
     def __str__(self):
-
-        def module_name(class_):
-            return '{}.{}'.format(class_.__module__, class_.__name__)
-
-        having_classes = ''
-
-        for having_class in self._having_classes[:-1]:
-            having_classes = '{}{}'.format(
-                having_classes, module_name(having_class)
+        if self._message is None:
+
+            def module_name(class_):
+                return '{}.{}'.format(class_.__module__, class_.__name__)
+
+            self._message = (
+                'Attribute {} was not found in class {}, this attribute is'
+                ' available in {}.'
+            ).format(
+                self._attribute,
+                module_name(self._lacking_class),
+                ', '.join(
+                    module_name(having_class)
+                    for having_class in self._having_classes
+                )
             )
 
-        last_having_class = self._having_classes[-1]
-        having_classes = '{}{}'.format(
-            having_classes,
-            module_name(last_having_class)
-        )
-
-        return (
-            'Attribute {} was not found in class {}, this attribute is'
-            ' available in {}.'
-        ).format(
-            self._attribute, module_name(self._lacking_class), having_classes
-        )
+        return self._message
 
 
 class DeletedAttributeError(Exception):
@@ -96,36 +106,412 @@ class DeletedAttributeError(Exception):
         )
 
 
+class _OpenSwitchAttribute(object):
+    """
+    Descriptor for the attributes declared in ``_class_openswitch_attributes``.
+
+    The value of the attribute is stored in the instance with the name of the
+    attribute prefixed with an underscore.
+
+    :param str name: Name of the attribute
+    :param str docstring: Documentation of the attribute
+    """
+
+    def __init__(self, name, docstring):
+        self._name = name
+        self._slot = '_{}'.format(name)
+        self.__doc__ = docstring
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        try:
+            return instance.__dict__[self._slot]
+
+        except KeyError:
+            # The value is not stored in the instance dictionary, fall back to
+            # a regular attribute lookup, it raises an AttributeError if the
+            # attribute was deleted.
+            return getattr(instance, self._slot)
+
+    def __set__(self, instance, value):
+        setattr(instance, self._slot, value)
+
+    def __delete__(self, instance):
+        delattr(instance, self._slot)
+
+
+class _TrackedOpenSwitchAttribute(_OpenSwitchAttribute):
+    """
+    Descriptor for the attributes declared in ``_class_openswitch_attributes``
+    that records every read in the ``_attribute_record`` set of the instance.
+
+    This descriptor is used when the lint mode is enabled.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        attributes = instance.__dict__
+
+        try:
+            value = attributes[self._slot]
+
+        except KeyError:
+            value = getattr(instance, self._slot)
+
+        record = attributes.get('_attribute_record')
+
+        if record is not None and self._name not in record:
+            record.add(self._name)
+
+        return value
+
+
+class _CompactOpenSwitchAttribute(_OpenSwitchAttribute):
+    """
+    Descriptor for the attributes declared in ``_class_openswitch_attributes``
+    of the classes that use the compact layout.
+
+    The value of the attribute is stored in a slot of the instance.
+
+    :param str name: Name of the attribute
+    :param str docstring: Documentation of the attribute
+    :param member: Descriptor of the slot where the value is stored
+    :param int bit: Bit of the attribute in the ``_attribute_bits`` bitmap of
+     the instance
+    :param bits: Descriptor of the ``_attribute_bits`` slot
+    """
+
+    def __init__(self, name, docstring, member, bit=None, bits=None):
+        super(_CompactOpenSwitchAttribute, self).__init__(name, docstring)
+        self._member = member
+        self._bit = bit
+        self._bits = bits
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        # An AttributeError is raised here if the attribute was deleted.
+        return self._member.__get__(instance, owner)
+
+
+class _TrackedCompactOpenSwitchAttribute(_CompactOpenSwitchAttribute):
+    """
+    Descriptor for the attributes of the classes that use the compact layout
+    that records every read in the ``_attribute_bits`` bitmap of the instance.
+
+    This descriptor is used when the lint mode is enabled.
+    """
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+
+        value = self._member.__get__(instance, owner)
+
+        try:
+            bits = self._bits.__get__(instance, owner)
+
+        except AttributeError:
+            return value
+
+        if not bits & self._bit:
+            self._bits.__set__(instance, bits | self._bit)
+
+        return value
+
+
+# Maximum number of results of _find_class memoized for each class
+_FOUND_CLASSES_SIZE = 512
+
+# Descriptors that record the reads of the attributes
+_TRACKED_ATTRIBUTES = (
+    _TrackedOpenSwitchAttribute, _TrackedCompactOpenSwitchAttribute
+)
+
+
+def _dereference(references):
+    """
+    Get the classes that are still alive from a tuple of weak references.
+
+    :param tuple references: Weak references to classes
+    :rtype: tuple
+    """
+    return tuple(
+        class_ for class_ in (reference() for reference in references)
+        if class_ is not None
+    )
+
+
+def _find_class(cls, attributes):
+    """
+    Memoized implementation of :meth:`OpenSwitchBase._find_class`.
+
+    :param type cls: The class of the node
+    :param frozenset attributes: Node attributes used in the test
+    :rtype: class
+    :return: The highest class that has all the attributes in the test
+    """
+    found = _MetaOpenSwitch._found_classes.get(cls)
+
+    if found is None:
+        found = _MetaOpenSwitch._found_classes[cls] = OrderedDict()
+
+    reference = found.get(attributes)
+    higher_class = None if reference is None else reference()
+
+    if higher_class is not None:
+        found.move_to_end(attributes)
+        return higher_class
+
+    higher_class = _search_class(cls, attributes)
+    # The result may be the class itself, a strong reference here would
+    # keep the key of the weak dictionary alive.
+    found[attributes] = ref(higher_class)
+    found.move_to_end(attributes)
+
+    # The least recently used results are discarded
+    while len(found) > _FOUND_CLASSES_SIZE:
+        found.popitem(last=False)
+
+    return higher_class
+
+
+def _search_class(cls, attributes):
+    """
+    Search the highest class that has all the attributes, see
+    :func:`_find_class`.
+    """
+    for parent in cls.__bases__:
+        if (
+            not issubclass(parent, OpenSwitchBase)
+        ) or parent.__dict__.get('__abstractmethods__', False):
+            continue
+        if parent == OpenSwitchBase:
+            return cls
+        if attributes.issubset(parent._class_attribute_keys):
+            return _find_class(parent, attributes)
+    else:
+        return cls
+
+
 class _MetaOpenSwitch(type):
 
-    def __init__(self, *args, **kwargs):
+    # Weak references to every class created with this metaclass, in the order
+    # the classes were created. Like with __subclasses__, a class that is
+    # garbage collected is no longer registered. The caches below only hold
+    # weak references to classes too, so they do not keep any class alive.
+    _registry = []
+
+    # Results of OpenSwitchBase._get_all_subclasses, as tuples of weak
+    # references keyed weakly by class.
+    _subclasses = WeakKeyDictionary()
+
+    # Inverted index that maps an attribute name to weak references to the
+    # concrete OpenSwitch classes that define it. It is built lazily by
+    # OpenSwitchBase._get_attribute_index.
+    _attribute_index = None
+
+    # Names that are known to be missing in a class and in every other
+    # OpenSwitch class, keyed weakly by class. Filled by
+    # OpenSwitchBase.__getattr__.
+    _missing_attributes = WeakKeyDictionary()
+
+    # Results of _find_class, keyed weakly by class and then by the set of
+    # attributes, with weak references to the classes found. The results of
+    # each class are ordered from the least to the most recently used.
+    _found_classes = WeakKeyDictionary()
+
+    # Bit of each attribute name in the _attribute_bits bitmap of the
+    # instances of the classes that use the compact layout.
+    _bit_registry = {}
+
+    def __new__(cls, name, bases, namespace, **kwargs):
+
+        def resolve(attribute, default=None):
+            if attribute in namespace:
+                return namespace[attribute]
+            for base in bases:
+                if hasattr(base, attribute):
+                    return getattr(base, attribute)
+            return default
+
+        compact = resolve('_openswitch_compact', False)
+
+        for base in bases:
+            if isinstance(base, _MetaOpenSwitch) and (
+                base._openswitch_compact != compact
+            ) and base._class_openswitch_attributes:
+                raise TypeError(
+                    'Class {} can not change the compact layout of class {} '
+                    'that already has OpenSwitch attributes, set '
+                    '_openswitch_compact in the class that declares the first '
+                    'OpenSwitch attributes.'.format(name, base.__name__)
+                )
+
+        # The slots of two unrelated compact classes can not be combined by
+        # Python, keep the most derived class of each base that has slots.
+        layouts = []
 
-        def getattribute(attr):
-            def internal(salf):
-                if attr not in salf._attribute_record:
-                    salf._attribute_record.add(attr)
-
-                return getattr(salf, '_{}'.format(attr))
-            return internal
-
-        for attr, docstring in self._class_openswitch_attributes.items():
-            setattr(
-                self, attr, property(
-                    getattribute(attr),
-                    (
-                        lambda attr: lambda salf, value: setattr(
-                            salf, '_{}'.format(attr), value
-                        )
-                    )(attr),
-                    (
-                        lambda attr: lambda salf: delattr(
-                            salf, '_{}'.format(attr)
-                        )
-                    )(attr),
-                    docstring
+        for base in bases:
+            if not isinstance(base, _MetaOpenSwitch) or (
+                not base._openswitch_compact
+            ):
+                continue
+
+            layout = next(
+                (
+                    class_ for class_ in base.__mro__
+                    if class_.__dict__.get('__slots__')
+                ), None
+            )
+
+            if layout is None or any(
+                issubclass(other, layout) for other in layouts
+            ):
+                continue
+
+            layouts = [
+                other for other in layouts if not issubclass(layout, other)
+            ] + [layout]
+
+        if len(layouts) > 1:
+            raise TypeError(
+                'Class {} can not combine the compact layouts of classes {} '
+                'that have OpenSwitch attributes, only one of the bases of a '
+                'class can add OpenSwitch attributes to the compact '
+                'layout.'.format(
+                    name, ', '.join(layout.__name__ for layout in layouts)
                 )
             )
 
+        if compact and '__slots__' not in namespace:
+            tracking = resolve('_openswitch_lint')
+
+            if tracking is None:
+                tracking = LINT
+
+            def in_bases(slot):
+                return any(
+                    isinstance(getattr(base, slot, None), MemberDescriptorType)
+                    for base in bases
+                )
+
+            slots = [
+                '_{}'.format(attr)
+                for attr in resolve('_class_openswitch_attributes', {})
+                if '_{}'.format(attr) not in namespace and
+                not in_bases('_{}'.format(attr))
+            ]
+
+            if tracking and not in_bases('_attribute_bits'):
+                slots.append('_attribute_bits')
+
+            namespace = dict(namespace)
+            namespace['__slots__'] = tuple(slots)
+
+        return super(_MetaOpenSwitch, cls).__new__(
+            cls, name, bases, namespace, **kwargs
+        )
+
+    def __init__(self, *args, **kwargs):
+
+        tracking = self._openswitch_lint
+
+        if tracking is None:
+            tracking = LINT
+
+        self._attribute_tracking = tracking
+
+        bits = getattr(self, '_attribute_bits', None)
+
+        attributes = dict(self._class_openswitch_attributes)
+
+        # The attributes inherited from classes without lint mode are declared
+        # again with tracked descriptors, so that the lint mode of a class
+        # applies to all the attributes of its instances.
+        if tracking:
+            for base in self.__mro__[1:]:
+                for attr, docstring in base.__dict__.get(
+                    '_class_openswitch_attributes', {}
+                ).items():
+                    if attr not in attributes and not isinstance(
+                        getattr(self, attr, None), _TRACKED_ATTRIBUTES
+                    ):
+                        attributes[attr] = docstring
+
+        for attr, docstring in attributes.items():
+            member = getattr(self, '_{}'.format(attr), None)
+
+            if not self._openswitch_compact or (
+                not isinstance(member, MemberDescriptorType)
+            ):
+                attribute_class = (
+                    _TrackedOpenSwitchAttribute if tracking
+                    else _OpenSwitchAttribute
+                )
+                attribute = attribute_class(attr, docstring)
+
+            elif tracking and isinstance(bits, MemberDescriptorType):
+                bit = _MetaOpenSwitch._bit_registry.setdefault(
+                    attr, 1 << len(_MetaOpenSwitch._bit_registry)
+                )
+                attribute = _TrackedCompactOpenSwitchAttribute(
+                    attr, docstring, member, bit, bits
+                )
+
+            else:
+                attribute = _CompactOpenSwitchAttribute(
+                    attr, docstring, member
+                )
+
+            setattr(self, attr, attribute)
+
+        # The keys of the class dictionary are computed once here to be used
+        # by OpenSwitchBase._find_class.
+        self._class_attribute_keys = frozenset(self.__dict__.keys())
+
+        _MetaOpenSwitch._register(self)
+
+    @staticmethod
+    def _register(cls):
+        """
+        Register a class created with this metaclass.
+
+        :param type cls: The class to register
+        """
+        _MetaOpenSwitch._registry.append(
+            ref(cls, _MetaOpenSwitch._unregister)
+        )
+        _MetaOpenSwitch._invalidate()
+
+    @staticmethod
+    def _unregister(reference):
+        """
+        Remove a garbage collected class from the registry.
+
+        :param reference: The dead weak reference to the class
+        """
+        try:
+            _MetaOpenSwitch._registry.remove(reference)
+        except ValueError:
+            pass
+        _MetaOpenSwitch._invalidate()
+
+    @staticmethod
+    def _invalidate():
+        """
+        Discard every cache that depends on the registered classes.
+        """
+        _MetaOpenSwitch._subclasses = WeakKeyDictionary()
+        _MetaOpenSwitch._attribute_index = None
+        _MetaOpenSwitch._missing_attributes = WeakKeyDictionary()
+        _MetaOpenSwitch._found_classes = WeakKeyDictionary()
+
 
 class _ABCMetaMetaOpenSwitch(ABCMeta, _MetaOpenSwitch):
     pass
@@ -145,20 +531,75 @@ class OpenSwitchBase(object):
     exception will be raised to let the use know of this situation.
     All the attributes of the subclasses of this class should be properties.
 
+    When the lint mode is enabled, the attributes read in each node are
+    recorded so that :class:`AttributeUsageCollector` can report the nodes for
+    which a less specific class would have been enough. The lint mode is
+    enabled for every class when the ``TOPOLOGY_OPENSWITCH_LINT`` environment
+    variable is set to a true value. A class (and its subclasses) can override
+    this by setting ``_openswitch_lint`` to ``True`` or ``False``.
+
+    A class can set ``_openswitch_compact`` to ``True`` to use a compact
+    layout for its instances and the instances of its subclasses. In this
+    layout, the values of the OpenSwitch attributes are stored in slots and
+    the attributes read in lint mode are recorded in an integer bitmap instead
+    of a set. This must be set in the class that declares the first OpenSwitch
+    attributes of the hierarchy. A class can not inherit from two compact
+    classes that both add OpenSwitch attributes, because their slots can not
+    be combined. Declare the attributes of one of them in a common base class
+    instead.
+
     See :class:`topology.base.CommonNode` for more information.
     """
     _class_openswitch_attributes = {}
+    _openswitch_lint = None
+    _openswitch_compact = False
 
     @abstractmethod
     def __init__(self, *args, **kwargs):
-        self._attribute_record = set()
+        if self._attribute_tracking:
+            if self._openswitch_compact:
+                self._attribute_bits = 0
+            else:
+                self._attribute_record = set()
 
         super(OpenSwitchBase, self).__init__(*args, **kwargs)
 
+    def __del__(self):
+        """
+        Hand the attribute record of the node to ``LINT_COLLECTOR``.
+
+        Nodes are destroyed when the topology is unbuilt, so no explicit call
+        is needed to get the report of the lint mode.
+        """
+        if self._attribute_tracking:
+            try:
+                LINT_COLLECTOR.collect((self, ))
+            except Exception:
+                # The node was not fully initialized
+                pass
+
+    def _get_attribute_record(self):
+        """
+        Get the OpenSwitch attributes that have been read from this node.
+
+        :rtype: frozenset
+        :return: The names of the attributes read while in lint mode
+        """
+        record = set(self.__dict__.get('_attribute_record', ()))
+        bits = getattr(self, '_attribute_bits', 0)
+
+        if bits:
+            record.update(
+                name for name, bit in _MetaOpenSwitch._bit_registry.items()
+                if bits & bit
+            )
+
+        return frozenset(record)
+
     @classmethod
     def _find_attribute(cls, name, lacking_class):
         """
-        Recursively find an attribute in the subclasses of OpenSwitch.
+        Find an attribute in the subclasses of OpenSwitch.
 
         This method raises an WrongAttribtueError exception if the attribute is
         not present in the object but belongs to other class.
@@ -166,28 +607,51 @@ class OpenSwitchBase(object):
         :param str name: The name of the attribute to look for
         :param class lacking_class: The class where the attribute was not found
         """
-        if cls == OpenSwitchBase:
-            subclasses = [
-                subclass for subclass in cls._get_all_subclasses() if not (
-                    subclass.__dict__.get('__abstractmethods__', False)
-                )
-            ]
+        having_classes = _dereference(
+            cls._get_attribute_index().get(name, ())
+        )
+
+        if having_classes:
+            raise WrongAttributeError(name, lacking_class, having_classes)
+
+    @classmethod
+    def _get_attribute_index(cls):
+        """
+        Get the index of attribute names to the classes that define them.
 
-            subclasses_with_attribute = []
+        The index is built the first time it is requested after a class has
+        been created with the OpenSwitch metaclass, every other call returns
+        the already built index.
 
-            for subclass in subclasses:
-                if name in subclass.__dict__.keys():
-                    subclasses_with_attribute.append(subclass)
+        :rtype: dict
+        :return: A dictionary that maps every attribute name of the concrete
+         subclasses of OpenSwitchBase to a tuple of weak references to the
+         classes that define it
+        """
+        index = _MetaOpenSwitch._attribute_index
 
-            if subclasses_with_attribute:
-                raise WrongAttributeError(
-                    name, lacking_class, subclasses_with_attribute
-                )
+        if index is None:
+            index = {}
+
+            for subclass in OpenSwitchBase._get_all_subclasses():
+                if subclass.__dict__.get('__abstractmethods__', False):
+                    continue
+
+                # The slots of the compact layout hold instance values, they
+                # are not attributes of the class.
+                slots = subclass.__dict__.get('__slots__', ())
+
+                for name in subclass.__dict__.keys():
+                    if name not in slots:
+                        index.setdefault(name, []).append(ref(subclass))
 
-        else:
-            for base in cls.__bases__:
-                if issubclass(base, OpenSwitchBase):
-                    base._find_attribute(name, lacking_class)
+            index = {
+                name: tuple(subclasses) for name, subclasses in index.items()
+            }
+
+            _MetaOpenSwitch._attribute_index = index
+
+        return index
 
     def __getattr__(self, name):
         """
@@ -195,72 +659,212 @@ class OpenSwitchBase(object):
 
         This method is called when the attribute is not found, and it triggers
         a search for a class that actually has this attribute.
+
+        Names that are not found in any class are remembered, so the following
+        attempts to get them fail immediately.
         """
-        if name in self.__class__.__dict__.keys():
+        cls = self.__class__
+
+        if name in cls.__dict__:
             raise DeletedAttributeError(name)
-        self.__class__._find_attribute(name, self.__class__)
 
-        return self.__getattribute__(name)
+        missing = _MetaOpenSwitch._missing_attributes.get(cls)
+
+        if missing is not None and name in missing:
+            raise AttributeError(
+                '\'{}\' object has no attribute \'{}\''.format(
+                    cls.__name__, name
+                )
+            )
+
+        cls._find_attribute(name, cls)
+
+        try:
+            return self.__getattribute__(name)
+
+        except AttributeError:
+            if not any(name in base.__dict__ for base in cls.__mro__):
+                _MetaOpenSwitch._missing_attributes.setdefault(
+                    cls, set()
+                ).add(name)
+            raise
 
     @classmethod
     def _get_all_subclasses(cls):
         """
-        Recursively finds all the subclasses of this class.
+        Find all the subclasses of this class.
+
+        The subclasses are taken from the registry that the OpenSwitch
+        metaclass fills when each class is created, so every subclass is
+        returned only once, in the order it was created. The result is cached
+        until a new class is registered.
 
         :param type cls: A class to search for subclasses
-        :rtype: list
-        :return: A list of the name of all the subclasses of this class
+        :rtype: tuple
+        :return: A tuple of all the subclasses of this class
         """
-        subclasses = cls.__subclasses__()
-        subsubclasses = []
-
-        for subclass in subclasses:
-            subsubclasses.extend(subclass._get_all_subclasses())
+        references = _MetaOpenSwitch._subclasses.get(cls)
 
-        subclasses.extend(subsubclasses)
+        if references is None:
+            references = tuple(
+                reference for reference in _MetaOpenSwitch._registry
+                if reference() is not None and reference() is not cls and (
+                    cls in reference().__mro__
+                )
+            )
+            _MetaOpenSwitch._subclasses[cls] = references
 
-        return subclasses
+        return _dereference(references)
 
     @classmethod
     def _find_class(cls, attributes):
         """
-        Raise a warning if parent class has all attributes used in the test.
+        Find the highest class that has all attributes used in the test.
 
-        This is done to inform the user that an unnecessarily specific node is
+        This is used to inform the user that an unnecessarily specific node is
         being used in the test case.
 
+        The results are memoized for each class and set of attributes.
+
         :param: set attributes: Node attributes used in the test
         :rtype: class
         :return: The highest class that has all the attributes in the test
         """
+        return _find_class(cls, frozenset(attributes))
+
+
+class AttributeUsageCollector(object):
+    """
+    Collector of the OpenSwitch attributes used by the nodes of a topology.
+
+    When lint mode is enabled, each node records the OpenSwitch attributes
+    that have been read from it. This collector gathers those records,
+    usually right before the topology is unbuilt, and reports the nodes that
+    could have been instantiated with a less specific class.
 
-        for parent in cls.__bases__:
-            if (
-                not issubclass(parent, OpenSwitchBase)
-            ) or parent.__dict__.get('__abstractmethods__', False):
+    The nodes are grouped by their class and set of used attributes, so the
+    analysis is done only once for each distinct pair.
+
+    ``LINT_COLLECTOR`` gathers the record of every node in lint mode when the
+    node is destroyed and emits its report at exit. Another collector can be
+    used to get the report of a topology at a given point:
+
+    ::
+
+        collector = AttributeUsageCollector()
+        collector.collect(topology.nodes.values())
+        topology.unbuild()
+        collector.emit()
+    """
+
+    def __init__(self):
+        self._usage = OrderedDict()
+
+    def collect(self, nodes):
+        """
+        Gather the attribute record of the nodes.
+
+        Nodes that are not OpenSwitch nodes or that do not have lint mode
+        enabled are ignored.
+
+        :param nodes: An iterable of engine nodes
+        """
+        for node in nodes:
+            if not isinstance(node, OpenSwitchBase) or (
+                not node._attribute_tracking
+            ):
                 continue
-            if parent == OpenSwitchBase:
-                return cls
-            if attributes.issubset(set(parent.__dict__.keys())):
-                return parent._find_class(attributes)
-        else:
-            return cls
 
-    def __del__(self):
-        higher_class = self.__class__._find_class(self._attribute_record)
-
-        if higher_class != self.__class__:
-            warn(
-                '{} should be instantiated using class {}.{}'.format(
-                    self.identifier,
-                    higher_class.__module__,
-                    higher_class.__name__
-                ),
-                UserWarning
-            )
+            self._usage.setdefault(
+                (node.__class__, node._get_attribute_record()), []
+            ).append(node.identifier)
+
+    def clear(self):
+        """
+        Discard all the gathered records.
+        """
+        self._usage.clear()
+
+    def analyze(self):
+        """
+        Find the nodes that could have used a less specific class.
+
+        :rtype: list
+        :return: A list of dictionaries, one for each class and set of used
+         attributes that could have used a less specific class, with the keys
+         ``nodes``, ``class``, ``suggested_class`` and ``attributes``.
+        """
+
+        def class_name(class_):
+            return '{}.{}'.format(class_.__module__, class_.__name__)
+
+        findings = []
+
+        for (node_class, attributes), nodes in self._usage.items():
+            higher_class = node_class._find_class(attributes)
+
+            if higher_class is node_class:
+                continue
+
+            findings.append(OrderedDict([
+                ('nodes', list(nodes)),
+                ('class', class_name(node_class)),
+                ('suggested_class', class_name(higher_class)),
+                ('attributes', sorted(attributes))
+            ]))
+
+        return findings
+
+    def report(self, format='text'):
+        """
+        Render the findings of :meth:`analyze` as one consolidated report.
+
+        :param str format: ``text`` or ``json``
+        :rtype: str
+        :return: The rendered report
+        """
+        findings = self.analyze()
+
+        if format == 'json':
+            return dumps(findings, indent=4)
+
+        if format != 'text':
+            raise ValueError('Unknown report format {}'.format(format))
+
+        return '\n'.join(
+            '{} should be instantiated using class {}'.format(
+                ', '.join(finding['nodes']), finding['suggested_class']
+            ) for finding in findings
+        )
+
+    def emit(self):
+        """
+        Raise a single warning with the text report, if there are findings.
+        """
+        report = self.report()
+
+        if report:
+            warn(report, UserWarning)
+
+
+# Collector of the attribute records of the nodes in lint mode, filled as the
+# nodes are destroyed
+LINT_COLLECTOR = AttributeUsageCollector()
+
+
+@register
+def _emit_lint_report():
+    """
+    Emit the report of ``LINT_COLLECTOR`` and discard its records.
+    """
+    LINT_COLLECTOR.emit()
+    LINT_COLLECTOR.clear()
 
 
-__all__ = ['OpenSwitchBase', 'WrongAttributeError']
+__all__ = [
+    'OpenSwitchBase', 'WrongAttributeError', 'AttributeUsageCollector', 'LINT',
+    'LINT_COLLECTOR'
+]
 __author__ = 'Hewlett Packard Enterprise Development LP'
 __email__ = 'hpe-networking@lists.hp.com'
 __version__ = '0.1.0'
@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+topology_openswitch vtysh show output parsers module
+
+Templates declare the fields of the output of a show command as precompiled
+regular expressions, and :func:`parse` turns that output into a mapping:
+
+::
+
+    result = parse('show version', node('show version', shell='vtysh'))
+    assert result['version'] == '0.4.0'
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from re import compile, MULTILINE
+from types import MappingProxyType
+from hashlib import sha1
+from threading import Lock
+from collections import OrderedDict
+from collections.abc import Mapping
+
+
+def _ports(value):
+    """
+    Convert a comma separated list of ports into a tuple.
+    """
+    return tuple(port.strip() for port in value.split(',') if port.strip())
+
+
+class Field(object):
+    """
+    Field of the output of a show command.
+
+    :param str pattern: Regular expression whose first group is the value of
+     the field. It is compiled in multiline mode.
+    :param convert: Function applied to the value
+    :param default: Value of the field if the pattern does not match
+    """
+
+    def __init__(self, pattern, convert=None, default=None):
+        self.regex = compile(pattern, MULTILINE)
+        self.convert = convert
+        self.default = default
+
+    def extract(self, output):
+        """
+        Extract the value of the field.
+
+        :param str output: The output of the command
+        """
+        match = self.regex.search(output)
+
+        if match is None:
+            return self.default
+
+        value = match.group(1)
+
+        return value if self.convert is None else self.convert(value)
+
+
+class Template(object):
+    """
+    Template of the output of a show command made of independent fields.
+
+    Each field is extracted only when it is accessed in lazy results.
+
+    :param fields: An ordered mapping of field names to :class:`Field`
+    """
+
+    # Fields can be extracted one by one
+    incremental = True
+
+    def __init__(self, fields):
+        self.fields = OrderedDict(fields)
+
+    def keys(self, output):
+        """
+        :rtype: list
+        :return: The names of the fields
+        """
+        return list(self.fields.keys())
+
+    def extract(self, output, key):
+        """
+        Extract a field.
+
+        :param str output: The output of the command
+        :param str key: The name of the field
+        """
+        return self.fields[key].extract(output)
+
+    def extract_all(self, output):
+        """
+        Extract all the fields.
+
+        :param str output: The output of the command
+        :rtype: OrderedDict
+        """
+        return OrderedDict(
+            (name, field.extract(output))
+            for name, field in self.fields.items()
+        )
+
+
+class TableTemplate(Template):
+    """
+    Template of the output of a show command with a row per entry.
+
+    All the rows are extracted the first time any of them is accessed. Rows
+    are read-only mappings, because the results may be shared.
+
+    :param str row: Regular expression that matches a row, with a named group
+     per column. It is compiled in multiline mode.
+    :param str key: Name of the column used as key of the rows
+    :param dict converters: Functions applied to the value of some columns
+    """
+
+    incremental = False
+
+    def __init__(self, row, key, converters=None):
+        super(TableTemplate, self).__init__(())
+        self.row = compile(row, MULTILINE)
+        self.key = key
+        self.converters = converters or {}
+
+    def keys(self, output):
+        return list(self.extract_all(output).keys())
+
+    def extract(self, output, key):
+        return self.extract_all(output)[key]
+
+    def extract_all(self, output):
+        rows = OrderedDict()
+
+        for match in self.row.finditer(output):
+            row = OrderedDict()
+
+            for column, value in match.groupdict().items():
+                converter = self.converters.get(column)
+                row[column] = value if converter is None or value is None \
+                    else converter(value)
+
+            rows[row.pop(self.key)] = MappingProxyType(row)
+
+        return rows
+
+
+class ParseResult(Mapping):
+    """
+    Read-only mapping with the fields of the output of a show command.
+
+    Fields are extracted from the output when they are first accessed, and
+    kept after that.
+
+    :param Template template: The template of the output
+    :param str output: The output of the command
+    """
+
+    def __init__(self, template, output):
+        self._template = template
+        self._output = output
+        self._values = OrderedDict()
+        self._complete = False
+
+    def evaluate(self):
+        """
+        Extract all the fields that have not been extracted yet.
+
+        :rtype: ParseResult
+        :return: This result
+        """
+        if not self._complete:
+            if self._template.incremental:
+                for key in self._template.keys(self._output):
+                    self[key]
+            else:
+                self._values = self._template.extract_all(self._output)
+
+            self._complete = True
+
+        return self
+
+    def __getitem__(self, key):
+        try:
+            return self._values[key]
+        except KeyError:
+            if self._complete:
+                raise
+
+        if not self._template.incremental:
+            return self.evaluate()._values[key]
+
+        value = self._values[key] = self._template.extract(self._output, key)
+        return value
+
+    def __iter__(self):
+        if not self._template.incremental:
+            return iter(self.evaluate()._values)
+        return iter(self._template.keys(self._output))
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def __repr__(self):
+        return '{}({!r})'.format(
+            type(self).__name__, dict(self.evaluate()._values)
+        )
+
+
+class _ResultCache(object):
+    """
+    Least recently used cache of parse results keyed by output digest.
+
+    :param int size: Maximum number of results kept
+    """
+
+    def __init__(self, size=256):
+        self._size = size
+        self._results = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._results.pop(key, None)
+
+            if result is not None:
+                self._results[key] = result
+
+            return result
+
+    def set(self, key, result):
+        with self._lock:
+            self._results[key] = result
+
+            while len(self._results) > self._size:
+                self._results.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._results.clear()
+
+
+# Templates of the show commands, by command without arguments
+TEMPLATES = OrderedDict()
+
+_CACHE = _ResultCache()
+
+
+def register_template(command, template):
+    """
+    Register the template of the output of a show command.
+
+    :param str command: The command, without arguments. Longer commands take
+     precedence, so ``show interface brief`` can have its own template.
+    :param Template template: The template of its output
+    """
+    TEMPLATES[command] = template
+    _CACHE.clear()
+
+
+def get_template(command):
+    """
+    Get the template of the output of a command.
+
+    :param str command: The command, arguments are ignored
+    :rtype: Template
+    """
+    command = ' '.join(command.split())
+
+    for registered in sorted(TEMPLATES, key=len, reverse=True):
+        if command == registered or command.startswith(registered + ' '):
+            return TEMPLATES[registered]
+
+    raise KeyError('No template for command "{}"'.format(command))
+
+
+def digest(output):
+    """
+    Get the digest of the output of a command.
+
+    :param str output: The output of the command
+    :rtype: str
+    """
+    return sha1(output.encode('utf-8')).hexdigest()
+
+
+def parse(command, output, lazy=False):
+    """
+    Parse the output of a show command.
+
+    Results are cached by template and output digest, so the same output is
+    parsed only once. The returned mappings, including the rows of tables, are
+    read-only because they may be shared.
+
+    :param str command: The command that produced the output
+    :param str output: The output of the command
+    :param bool lazy: Extract the fields only when they are accessed
+    :rtype: ParseResult
+    """
+    template = get_template(command)
+    key = (id(template), digest(output))
+
+    result = _CACHE.get(key)
+
+    if result is None:
+        result = ParseResult(template, output)
+        _CACHE.set(key, result)
+
+    return result if lazy else result.evaluate()
+
+
+register_template('show version', Template([
+    ('version', Field(r'^OpenSwitch\s+(\S+)')),
+    ('build', Field(r'^OpenSwitch\s+\S+\s+\(Build:\s*([^)]+)\)')),
+    ('build_date', Field(r'^Build Date\s*:\s*(.*?)\s*$')),
+    ('build_id', Field(r'^Build ID\s*:\s*(.*?)\s*$')),
+    ('build_sha', Field(r'^Build SHA\s*:\s*(.*?)\s*$')),
+    ('active_image', Field(r'^Active Image\s*:\s*(.*?)\s*$')),
+]))
+
+register_template('show interface', Template([
+    ('interface', Field(r'^Interface\s+(\S+)\s+is')),
+    ('interface_state', Field(r'^Interface\s+\S+\s+is\s+(\w+)')),
+    ('state_description', Field(r'^Interface\s+\S+\s+is\s+\w+\s+\((.*)\)')),
+    ('admin_state', Field(r'^\s*Admin state is\s+(\S+)')),
+    ('state_information', Field(r'^\s*State information:\s*(.*?)\s*$')),
+    ('mac_address', Field(r'MAC Address:\s*(\S+)')),
+    ('mtu', Field(r'^\s*MTU\s+(\d+)', int)),
+    ('duplex', Field(r'^\s*(\w+)-duplex', str.lower)),
+    ('speed', Field(r'^\s*Speed\s+(\d+)\s+Mb/s', int)),
+    ('autonegotiation', Field(r'Auto-Negotiation is turned\s+(\w+)')),
+    ('rx_packets', Field(r'^\s*RX\s+(\d+)\s+input packets', int)),
+    ('rx_bytes', Field(r'^\s*RX\s+\d+\s+input packets\s+(\d+)\s+bytes', int)),
+    ('tx_packets', Field(r'^\s*TX\s+(\d+)\s+output packets', int)),
+    ('tx_bytes', Field(
+        r'^\s*TX\s+\d+\s+output packets\s+(\d+)\s+bytes', int
+    )),
+]))
+
+register_template('show vlan', TableTemplate(
+    r'^(?P<vlan_id>\d+)[ \t]+(?P<name>\S+)[ \t]+(?P<status>\S+)[ \t]+'
+    r'(?P<reason>\S+)(?:[ \t]+(?P<ports>.*?))?[ \t]*$',
+    'vlan_id', {'ports': _ports}
+))
+
+
+__all__ = [
+    'Field', 'Template', 'TableTemplate', 'ParseResult', 'TEMPLATES',
+    'register_template', 'get_template', 'digest', 'parse'
+]
@@ -0,0 +1,273 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+topology_openswitch vtysh session pool module
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from time import sleep, monotonic
+from logging import getLogger
+from threading import Thread, Lock
+from contextlib import contextmanager
+from queue import Queue, Empty
+
+from topology_openswitch.vtysh import (
+    _VtyshError, _BASH_FORCED_PROMPT_BYTES_RE, _backoff
+)
+
+log = getLogger(__name__)
+
+
+class VtyshSessionPool(object):
+    """
+    Pool of pre-warmed vtysh sessions of a shell.
+
+    Each session is a named connection of the shell with vtysh already
+    started and its prompt negotiated. Sessions are checked with an empty
+    command before being handed out, and the ones that crashed are replaced
+    in background threads, so callers do not wait for vtysh to start again.
+
+    ::
+
+        pool = VtyshSessionPool(node.get_shell('vtysh'), size=2)
+        pool.start()
+
+        with pool.session() as connection:
+            node('show version', shell='vtysh', connection=connection)
+
+        pool.close()
+
+    :param shell: A shell that uses :class:`VtyshShellMixin`
+    :param int size: Number of sessions in the pool
+    :param str prefix: Prefix of the names of the connections of the pool
+    :param int health_timeout: Seconds to wait for the health check
+    """
+
+    # Initial and maximum delays in seconds between replacement attempts
+    _replace_initial_delay = 0.5
+    _replace_max_delay = 10
+
+    def __init__(self, shell, size=2, prefix='pool', health_timeout=5):
+        self._shell = shell
+        self._health_timeout = health_timeout
+        self._connections = [
+            '{}{}'.format(prefix, number) for number in range(size)
+        ]
+        self._idle = Queue()
+        self._lock = Lock()
+        self._replacements = []
+        self._closed = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def start(self):
+        """
+        Start vtysh in all the sessions of the pool concurrently.
+
+        This method returns when all the sessions have been started.
+        """
+        for connection in self._connections:
+            self._replace(connection)
+
+        self.wait()
+
+    def wait(self):
+        """
+        Wait for the sessions being replaced.
+        """
+        with self._lock:
+            replacements, self._replacements = self._replacements, []
+
+        for replacement in replacements:
+            replacement.join()
+
+    def acquire(self, timeout=None):
+        """
+        Get a healthy session of the pool.
+
+        Sessions that fail the health check are replaced in the background and
+        the next one is tried.
+
+        :param float timeout: Seconds to wait for a healthy session, wait
+         forever if not given
+        :rtype: str
+        :return: The name of the connection of the session
+        """
+        deadline = None if timeout is None else monotonic() + timeout
+
+        while True:
+            try:
+                connection = self._idle.get(
+                    timeout=None if deadline is None else max(
+                        deadline - monotonic(), 0
+                    )
+                )
+            except Empty:
+                raise Exception(
+                    'No healthy vtysh session available after {} '
+                    'seconds'.format(timeout)
+                )
+
+            if self._is_healthy(connection):
+                return connection
+
+            log.warning(
+                'vtysh session {} is not healthy, replacing it'.format(
+                    connection
+                )
+            )
+            self._replace(connection)
+
+    def release(self, connection, crashed=False):
+        """
+        Return a session to the pool.
+
+        :param str connection: The name of the connection of the session
+        :param bool crashed: True if vtysh crashed in the session, so it is
+         replaced instead of being reused
+        """
+        if crashed:
+            self._replace(connection)
+        else:
+            self._idle.put(connection)
+
+    @contextmanager
+    def session(self, timeout=None):
+        """
+        Context manager that acquires a session and releases it when done.
+
+        If a vtysh crash error is raised inside the context, the session is
+        replaced.
+
+        :param float timeout: Seconds to wait for a healthy session
+        """
+        connection = self.acquire(timeout=timeout)
+
+        try:
+            yield connection
+        except _VtyshError:
+            self.release(connection, crashed=True)
+            raise
+        except Exception:
+            self.release(connection)
+            raise
+        else:
+            self.release(connection)
+
+    def close(self):
+        """
+        Stop replacing sessions and disconnect all of them.
+        """
+        self._closed = True
+        self.wait()
+
+        for connection in self._connections:
+            try:
+                self._shell.disconnect(connection=connection)
+            except Exception as error:
+                log.warning(
+                    'Unable to disconnect vtysh session {}: {}'.format(
+                        connection, error
+                    )
+                )
+
+    def _is_healthy(self, connection):
+        """
+        Check that vtysh is still running in a session.
+
+        :param str connection: The name of the connection of the session
+        :rtype: bool
+        """
+        try:
+            if not self._shell.is_connected(connection=connection):
+                return False
+
+            self._shell.send_command(
+                '', connection=connection, timeout=self._health_timeout,
+                silent=True
+            )
+            self._shell._handle_crash(connection)
+
+            # vtysh may have exited without a known crash message
+            after = self._shell._get_connection(connection).after
+
+            return not (
+                isinstance(after, bytes) and
+                _BASH_FORCED_PROMPT_BYTES_RE.match(after) is not None
+            )
+
+        except Exception:
+            return False
+
+    def _replace(self, connection):
+        """
+        Restart vtysh in a session in a background thread.
+
+        :param str connection: The name of the connection of the session
+        """
+        replacement = Thread(
+            target=self._restart, args=(connection, ),
+            name='vtysh-pool-{}'.format(connection)
+        )
+        replacement.daemon = True
+
+        with self._lock:
+            self._replacements.append(replacement)
+
+        replacement.start()
+
+    def _restart(self, connection):
+        """
+        Connect a session again until it succeeds or the pool is closed.
+
+        :param str connection: The name of the connection of the session
+        """
+        delays = _backoff(
+            self._replace_initial_delay, self._replace_max_delay
+        )
+
+        while not self._closed:
+            try:
+                if self._shell.is_connected(connection=connection):
+                    self._shell.disconnect(connection=connection)
+            except Exception:
+                pass
+
+            try:
+                self._shell.connect(connection=connection)
+            except Exception as error:
+                log.warning(
+                    'Unable to start vtysh in session {}: {}'.format(
+                        connection, error
+                    )
+                )
+                sleep(next(delays))
+                continue
+
+            self._idle.put(connection)
+            return
+
+
+__all__ = ['VtyshSessionPool']
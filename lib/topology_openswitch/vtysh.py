@@ -23,14 +23,21 @@ from __future__ import unicode_literals, absolute_import
 from __future__ import print_function, division
 
 from logging import warning
-from re import search, match
-from time import sleep
+from codecs import getincrementaldecoder
+from re import compile, DOTALL
+from time import time, sleep, monotonic
+from random import uniform
 from logging import getLogger
+from collections import namedtuple, OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 
-from pexpect import EOF
+from pexpect import EOF, TIMEOUT
 
 from topology.platforms.shell import PExpectBashShell
 
+from topology_openswitch.parsers import digest
+from topology_openswitch.capabilities import CAPABILITY_CACHE
+
 log = getLogger(__name__)
 
 # Regular expression template that matches a vtysh prompt along with its
@@ -55,6 +62,197 @@ BASH_FORCED_PROMPT = PExpectBashShell.FORCED_PROMPT
 VTYSH_FORCED_PROMPT = _VTYSH_PROMPT_TPL.format(_VTYSH_FORCED)
 VTYSH_STANDARD_PROMPT = _VTYSH_PROMPT_TPL.format(_VTYSH_STANDARD)
 
+# Compiled prompts, to be matched against decoded output
+VTYSH_FORCED_PROMPT_RE = compile(VTYSH_FORCED_PROMPT)
+VTYSH_STANDARD_PROMPT_RE = compile(VTYSH_STANDARD_PROMPT)
+BASH_FORCED_PROMPT_RE = compile(BASH_FORCED_PROMPT)
+
+
+def _compile_matches(*patterns):
+    """
+    Compile a list of patterns to be passed to ``expect_list``.
+
+    The spawns of the shells are created without an encoding, so the patterns
+    are compiled as bytes, with the same flags that pexpect uses. EOF and
+    TIMEOUT are left as they are.
+
+    :rtype: list
+    :return: The compiled patterns
+    """
+    return [
+        pattern if pattern in (EOF, TIMEOUT)
+        else compile(pattern.encode('utf-8'), DOTALL)
+        for pattern in patterns
+    ]
+
+
+# Compiled lists of patterns expected in each step of the vtysh interaction
+_VTYSH_START_MATCHES = _compile_matches(
+    VTYSH_STANDARD_PROMPT, BASH_FORCED_PROMPT
+)
+_SET_PROMPT_MATCHES = _compile_matches(
+    VTYSH_STANDARD_PROMPT, VTYSH_FORCED_PROMPT
+)
+_END_MATCHES = _compile_matches(VTYSH_STANDARD_PROMPT)
+_BATCH_MATCHES = _compile_matches(VTYSH_FORCED_PROMPT, BASH_FORCED_PROMPT)
+_EXIT_MATCHES = _compile_matches(EOF, BASH_FORCED_PROMPT)
+
+# Forced bash prompt, to be matched against the raw output of a spawn
+_BASH_FORCED_PROMPT_BYTES_RE = _EXIT_MATCHES[1]
+
+# Errors shown by vtysh before the standard prompt when it does not have the
+# set prompt command
+_SET_PROMPT_REJECTED_RE = compile(
+    b'% (Unknown command|There is no matched command)'
+)
+
+# Steps of the vtysh interactions, yielded by the step generators of the
+# shell to wait for some patterns in the output of the spawn or for some
+# seconds. Running the same steps blocking or in an event loop keeps both
+# ways of driving vtysh in sync.
+_Expect = namedtuple('_Expect', ['patterns', 'timeout'])
+_Sleep = namedtuple('_Sleep', ['delay'])
+
+# Metrics of the vtysh start up in a connection: if vtysh accepted the set
+# prompt command, the number of times vtysh was started, the number of times
+# set prompt was sent and the seconds it took for vtysh to be ready.
+VtyshReadiness = namedtuple(
+    'VtyshReadiness', [
+        'set_prompt', 'spawn_attempts', 'set_prompt_attempts', 'elapsed'
+    ]
+)
+
+# Result of a wait for a vtysh state: the last value produced by the parser,
+# the number of times the command was sent, the number of outputs parsed and
+# the seconds it took.
+WaitResult = namedtuple('WaitResult', ['value', 'polls', 'parses', 'elapsed'])
+
+
+def _backoff(initial, maximum, factor=2):
+    """
+    Generate exponentially increasing delays with jitter.
+
+    Each delay is a random value between the half and the whole of the
+    current delay, which is multiplied by ``factor`` after each step up to
+    ``maximum``.
+
+    :param float initial: Initial delay in seconds
+    :param float maximum: Maximum delay in seconds
+    :param float factor: Growth factor of the delay
+    """
+    delay = initial
+
+    while True:
+        yield uniform(delay / 2, delay)
+        delay = min(delay * factor, maximum)
+
+
+class WaitTimeoutError(Exception):
+    """
+    Raised when a vtysh state is not reached in time.
+
+    :param str command: The command that was polled
+    :param WaitResult result: The result of the last poll
+    """
+
+    def __init__(self, command, result):
+        super(WaitTimeoutError, self).__init__(command, result)
+        self.command = command
+        self.result = result
+
+    def __str__(self):
+        return (
+            'Condition not met polling "{}" {} times in {:.2f} seconds, last '
+            'value: {}'.format(
+                self.command, self.result.polls, self.result.elapsed,
+                self.result.value
+            )
+        )
+
+
+# Known vtysh errors, keyed by the name of their group in _CRASH_RE
+_CRASH_ERRORS = OrderedDict()
+
+# Alternation of the crash messages of all the known vtysh errors
+_CRASH_RE = None
+
+
+def register_crash_error(error):
+    """
+    Register a vtysh error to be raised when its crash message is found.
+
+    The ``_crash_message`` attribute of the error is a regular expression that
+    is searched in the output of vtysh after it crashes. This function can be
+    used as a class decorator:
+
+    ::
+
+        @register_crash_error
+        class BusError(_VtyshError):
+            _crash_message = 'Bus error'
+
+    :param error: Subclass of ``_VtyshError`` to register
+    :return: The registered error
+    """
+    global _CRASH_RE
+
+    _CRASH_ERRORS['crash{}'.format(len(_CRASH_ERRORS))] = error
+
+    _CRASH_RE = compile('|'.join(
+        '(?P<{}>{})'.format(name, registered._crash_message)
+        for name, registered in _CRASH_ERRORS.items()
+    ))
+
+    return error
+
+
+class _OutputDecoder(object):
+    """
+    Decoder of the output of a connection.
+
+    Streams of output are decoded incrementally with :meth:`feed`, which
+    keeps incomplete multibyte characters until the rest of their bytes
+    arrive. Complete outputs, like the ``before`` attribute of a spawn, are
+    decoded with :meth:`decode`.
+
+    :param str encoding: Encoding of the output
+    :param str errors: Handling of decoding errors
+    """
+
+    def __init__(self, encoding='utf-8', errors='ignore'):
+        self._encoding = encoding
+        self._errors = errors
+        self._incremental = getincrementaldecoder(encoding)(errors=errors)
+
+    def decode(self, data):
+        """
+        Decode a complete output.
+
+        :param bytes data: The output to decode
+        :rtype: str
+        """
+        if not data:
+            return ''
+
+        return bytes(data).decode(self._encoding, errors=self._errors)
+
+    def feed(self, data):
+        """
+        Decode a chunk of a stream of output.
+
+        :param data: A bytes-like object, decoded without copying it
+        :rtype: str
+        :return: The text of the complete characters in the chunk and the
+         pending bytes of previous chunks
+        """
+        return self._incremental.decode(memoryview(data))
+
+    def reset(self):
+        """
+        Discard the pending bytes of the stream of output.
+        """
+        self._incremental.reset()
+
 
 class _VtyshError(Exception):
     """
@@ -72,6 +270,7 @@ class _VtyshError(Exception):
         )
 
 
+@register_crash_error
 class SegmentationFaultError(_VtyshError):
     """
     Pass
@@ -79,6 +278,7 @@ class SegmentationFaultError(_VtyshError):
     _crash_message = 'Segmentation fault'
 
 
+@register_crash_error
 class IllegalInstructionErrorError(_VtyshError):
     """
     Pass
@@ -86,6 +286,7 @@ class IllegalInstructionErrorError(_VtyshError):
     _crash_message = 'Illegal instruction error'
 
 
+@register_crash_error
 class AbortedError(_VtyshError):
     """
     Pass
@@ -93,6 +294,7 @@ class AbortedError(_VtyshError):
     _crash_message = 'Aborted'
 
 
+@register_crash_error
 class FloatingPointExceptionErrorError(_VtyshError):
     """
     Pass
@@ -100,6 +302,7 @@ class FloatingPointExceptionErrorError(_VtyshError):
     _crash_message = 'Floating point exception error'
 
 
+@register_crash_error
 class QuitError(_VtyshError):
     """
     Pass
@@ -110,8 +313,124 @@ class QuitError(_VtyshError):
 class VtyshShellMixin(object):
     """
     Mixin for the ``vtysh`` shell
+
+    Recent images of OpenSwitch accept the ``set prompt`` command only when
+    vtysh is ready. The command is retried with exponential backoff until it
+    is accepted or ``_set_prompt_deadline`` seconds have passed. The metrics of
+    the start up of each connection are available with :meth:`get_readiness`.
     """
 
+    # Total time in seconds to wait for vtysh to accept set prompt
+    _set_prompt_deadline = 600
+
+    # Initial and maximum delays in seconds between set prompt attempts
+    _set_prompt_initial_delay = 0.5
+    _set_prompt_max_delay = 10
+
+    # Exit all the connections at the same time
+    _exit_parallel = False
+
+    # Seconds to wait for all the connections to exit before closing them
+    _exit_deadline = None
+
+    _vtysh_readiness = None
+    _vtysh_decoders = None
+
+    # Identifier of the image of the node, used to cache its capabilities
+    _image_identifier = None
+
+    # CapabilityCache of the shell, the module one if not set
+    _capability_cache = None
+
+    # VtyshInstrumentation the shell is attached to, if any
+    _instrumentation = None
+
+    def get_readiness(self, connection=None):
+        """
+        Get the metrics of the vtysh start up in a connection.
+
+        :param str connection: Name of the connection
+        :rtype: VtyshReadiness
+        :return: The metrics of the connection or None if vtysh has not been
+         started in it
+        """
+        if self._vtysh_readiness is None:
+            return None
+
+        return self._vtysh_readiness.get(
+            self._get_connection_name(connection)
+        )
+
+    def _get_connection_name(self, connection=None):
+        """
+        Get the name of a connection, resolving the default one.
+
+        :param str connection: Name of the connection
+        :rtype: str
+        """
+        return connection or self._default_connection or '0'
+
+    def _record_readiness(self, connection, readiness):
+        """
+        Keep the metrics of the vtysh start up in a connection.
+
+        :param str connection: Name of the connection
+        :param VtyshReadiness readiness: The metrics of the connection
+        """
+        log.debug(
+            'vtysh ready in connection {} after {:.2f} seconds: {}'.format(
+                self._get_connection_name(connection),
+                readiness.elapsed, readiness
+            )
+        )
+
+        # The connections of a shell may be started from several threads,
+        # setdefault creates the dictionary only once for all of them.
+        self.__dict__.setdefault('_vtysh_readiness', {})[
+            self._get_connection_name(connection)
+        ] = readiness
+
+        if self._instrumentation is not None:
+            self._instrumentation.record_readiness(
+                self, connection, readiness
+            )
+
+    def _get_image_identifier(self, connection=None):
+        """
+        Get the identifier of the image of the node.
+
+        The capabilities of the images, like the support of ``set prompt``,
+        are cached by this identifier, so nodes running an image already known
+        are not probed again. Platforms can override this method to read the
+        identifier from the node, like the name of its image or its version.
+
+        :param str connection: Name of the connection
+        :rtype: str
+        :return: The identifier of the image or None if it is unknown, in that
+         case the capabilities are always probed
+        """
+        return self._image_identifier
+
+    def _get_decoder(self, connection=None):
+        """
+        Get the output decoder of a connection.
+
+        :param str connection: Name of the connection
+        :rtype: _OutputDecoder
+        """
+        # As in _record_readiness, setdefault keeps the first dictionary and
+        # decoder created by concurrent threads.
+        decoders = self.__dict__.setdefault('_vtysh_decoders', {})
+        name = self._get_connection_name(connection)
+        decoder = decoders.get(name)
+
+        if decoder is None:
+            decoder = decoders.setdefault(
+                name, _OutputDecoder(self._encoding, self._errors)
+            )
+
+        return decoder
+
     def _handle_crash(self, connection=None):
         """
         Handle all known vtysh crashes with a proper exception.
@@ -119,50 +438,151 @@ class VtyshShellMixin(object):
         :param str connection: The connection in which to handle a crash
         """
 
-        spawn = self._get_connection(connection)
+        if self._instrumentation is not None:
+            self._instrumentation.record_crash_check(self, connection)
 
-        errors = [
-            SegmentationFaultError,
-            IllegalInstructionErrorError,
-            AbortedError,
-            FloatingPointExceptionErrorError,
-            QuitError
-        ]
+        spawn = self._get_connection(connection)
 
         # One necessary condition to detect a segmentation fault error is
-        # to detect a forced bash prompt being matched.
-        forced_bash_prompt = match(
-            BASH_FORCED_PROMPT, spawn.after.decode(
-                encoding=self._encoding, errors=self._errors
-            )
+        # to detect a forced bash prompt being matched. This is checked first
+        # because it is cheap and it fails after almost every command.
+        after = spawn.after
+
+        if not isinstance(after, bytes) or (
+            _BASH_FORCED_PROMPT_BYTES_RE.match(after) is None
+        ):
+            return
+
+        # The other condition is to find the crash message of a known error,
+        # all of them are searched for in a single pass over the output.
+        crash = _CRASH_RE.search(
+            self._get_decoder(connection).decode(spawn.before)
         )
 
-        # The other condition is to find the matching error in the crash
-        # message.
-        for error in errors:
-            crash = search(
-                getattr(
-                    error, '_crash_message'
-                ), self.get_response(silent=True)
-            )
+        # This exception is raised to provide a meaningful error to the
+        # user.
+        if crash is not None:
+            raise _CRASH_ERRORS[crash.lastgroup](self._last_command)
+
+    def _run_steps(self, connection, steps):
+        """
+        Run the steps of a vtysh interaction, blocking while the spawn is
+        waited for.
 
-            # This exception is raised to provide a meaningful error to the
-            # user.
-            if crash and forced_bash_prompt is not None:
-                raise error(self._last_command)
+        Errors raised while waiting are thrown into the steps, so they can
+        handle them.
+
+        :param str connection: Name of the connection
+        :param steps: A generator of :class:`_Expect` and :class:`_Sleep`
+         steps that receives the index of the pattern matched by each
+         :class:`_Expect`
+        :return: The value returned by the generator
+        """
+        spawn = self._get_connection(connection)
+        resume, value = steps.send, None
+
+        try:
+            while True:
+                step = resume(value)
+                resume, value = steps.send, None
+
+                try:
+                    if isinstance(step, _Sleep):
+                        sleep(step.delay)
+                    else:
+                        value = spawn.expect_list(
+                            step.patterns, timeout=step.timeout
+                        )
+                except Exception as error:
+                    resume, value = steps.throw, error
+
+        except StopIteration as stop:
+            return stop.value
 
     def _determine_set_prompt(self, connection=None):
         """
         This method determines if the vtysh command ``set prompt`` exists.
 
         This method starts wit a call to sendline and finishes with a call
-        to expect.
+        to expect. The ``set prompt`` command is retried with exponential
+        backoff until vtysh accepts it or ``_set_prompt_deadline`` seconds have
+        passed.
+
+        The result is cached for the image of the node, as returned by
+        :meth:`_get_image_identifier`. If the image is known to not support
+        ``set prompt``, the command is not sent.
 
         :rtype: bool
         :return: True if vtysh supports the ``set prompt`` command, False
          otherwise.
         """
+        return self._run_steps(
+            connection, self._determine_set_prompt_steps(connection)
+        )
+
+    def _determine_set_prompt_steps(self, connection=None):
+        """
+        Steps of :meth:`_determine_set_prompt`.
+
+        :param str connection: Name of the connection
+        """
+        start = monotonic()
+
+        spawn_attempts = yield from self._start_vtysh_steps(connection)
+
+        # Images already known to not support set prompt are not probed
+        # again, that would take until the deadline.
+        image = self._get_image_identifier(connection)
+        cache = self._capability_cache or CAPABILITY_CACHE
+        known = None if image is None else cache.get(image, 'set_prompt')
+
+        if known is False:
+            set_prompt, set_prompt_attempts = False, 0
+
+        else:
+            deadline = start + self._set_prompt_deadline
+            set_prompt, set_prompt_attempts = yield from (
+                self._set_prompt_steps(connection, deadline)
+            )
+
+            # Only an image that accepted or rejected the command is cached,
+            # a node that was not ready before the deadline proves nothing.
+            # An image proven to support set prompt is not downgraded either.
+            if image is not None and known is None and set_prompt is not None:
+                cache.set(image, 'set_prompt', set_prompt)
+
+            set_prompt = bool(set_prompt)
+
+        self._record_readiness(
+            connection, VtyshReadiness(
+                set_prompt, spawn_attempts, set_prompt_attempts,
+                monotonic() - start
+            )
+        )
+
+        return set_prompt
+
+    def _start_vtysh(self, connection=None, attempts=10, timeout=30):
+        """
+        Start vtysh from the bash prompt of a connection.
+
+        :param str connection: Name of the connection
+        :param int attempts: Maximum number of times vtysh is started
+        :param int timeout: Seconds to wait for each attempt
+        :rtype: int
+        :return: The number of times vtysh was started
+        """
+        return self._run_steps(
+            connection,
+            self._start_vtysh_steps(connection, attempts, timeout)
+        )
+
+    def _start_vtysh_steps(self, connection=None, attempts=10, timeout=30):
+        """
+        Steps of :meth:`_start_vtysh`.
+        """
         spawn = self._get_connection(connection)
+        decoder = self._get_decoder(connection)
 
         # When a segmentation fault error happens, the message
         # "Segmentation fault" shows up in the terminal and then and EOF
@@ -174,20 +594,16 @@ class VtyshShellMixin(object):
         # follows after it. This is done to handle the segmentation fault
         # errors.
 
-        attempts = 10
-
-        for i in range(attempts):
+        for spawn_attempts in range(1, attempts + 1):
             try:
                 spawn.sendline('stdbuf -oL vtysh')
-                index = spawn.expect(
-                    [VTYSH_STANDARD_PROMPT, BASH_FORCED_PROMPT], timeout=30
-                )
+                index = yield _Expect(_VTYSH_START_MATCHES, timeout)
                 if index == 0:
                     break
                 elif index == 1:
                     log.warning(
                         'Unable to start vtysh, received output: {}'.format(
-                            spawn.before.decode('utf-8', errors='ignore')
+                            decoder.decode(spawn.before)
                         )
                     )
                     continue
@@ -200,31 +616,493 @@ class VtyshShellMixin(object):
                     'Unable to connect to vytsh after {} attempts, '
                     'last output received: {}'.format(
                         attempts,
-                        spawn.before.decode('utf-8', errors='ignore')
+                        decoder.decode(spawn.before)
                     )
                 ) from error
 
+        return spawn_attempts
+
+    def _set_prompt(self, connection, deadline):
+        """
+        Send ``set prompt`` until vtysh accepts it or the deadline passes.
+
+        :param str connection: Name of the connection
+        :param float deadline: Value of ``monotonic`` after which the command
+         is not sent again
+        :rtype: tuple
+        :return: True if vtysh accepted the command, False if vtysh rejected
+         it the last time it was sent, None if the deadline passed without an
+         answer, and the number of times it was sent
+        """
+        return self._run_steps(
+            connection, self._set_prompt_steps(connection, deadline)
+        )
+
+    def _set_prompt_steps(self, connection, deadline):
+        """
+        Steps of :meth:`_set_prompt`.
+        """
+        spawn = self._get_connection(connection)
+
         # The newer images of OpenSwitch include this command that changes
         # the prompt of the shell to an unique value. This is done to
         # perform a safe matching that will match only with this value in
         # each expect.
-        for attempt in range(0, 60):
+        delays = _backoff(
+            self._set_prompt_initial_delay, self._set_prompt_max_delay
+        )
+        set_prompt_attempts = 0
+
+        while True:
+            set_prompt_attempts += 1
+
             spawn.sendline('set prompt {}'.format(_VTYSH_FORCED))
-            index = spawn.expect([VTYSH_STANDARD_PROMPT, VTYSH_FORCED_PROMPT])
+            index = yield _Expect(_SET_PROMPT_MATCHES, -1)
+
+            # Since it is not possible to know beforehand if the image
+            # loaded in the node includes the "set prompt" command, an
+            # attempt to match any of the following prompts is done. If the
+            # command does not exist, the shell will return an standard
+            # prompt after showing an error message.
+            if index:
+                return True, set_prompt_attempts
 
             # If the image does not set the prompt immediately, wait and retry
-            if index == 0:
-                sleep(10)
+            # until the deadline is reached.
+            remaining = deadline - monotonic()
+
+            if remaining <= 0:
+                rejected = _SET_PROMPT_REJECTED_RE.search(spawn.before)
+                return (
+                    False if rejected else None
+                ), set_prompt_attempts
+
+            yield _Sleep(min(next(delays), remaining))
+
+    def recover_vtysh(
+        self, connection=None, snapshot=None, attempts=3, timeout=30
+    ):
+        """
+        Start vtysh again in a connection where it crashed.
+
+        After :meth:`_handle_crash` raises a crash error the connection is left
+        at the bash prompt. This method starts vtysh again in the same
+        connection in the prompt mode found when it was first started, without
+        probing the support of ``set prompt`` again.
+
+        A snapshot command can be given to collect the core dump or the logs
+        of the crash. It is run in the background of the bash shell of the
+        switch, so it does not delay the recovery:
+
+        ::
+
+            shell.recover_vtysh(
+                snapshot='tar czf /tmp/crash.tgz /var/diagnostics /var/log'
+            )
+
+        :param str connection: Name of the connection
+        :param str snapshot: Command to run in the background before starting
+         vtysh, its output is discarded
+        :param int attempts: Maximum number of times vtysh is started
+        :param int timeout: Seconds to wait for vtysh to start and to accept
+         ``set prompt``
+        :rtype: VtyshReadiness
+        :return: The metrics of the recovery
+        """
+        spawn = self._get_connection(connection)
+        previous = self.get_readiness(connection)
+
+        after = spawn.after
+
+        if not isinstance(after, bytes) or (
+            _BASH_FORCED_PROMPT_BYTES_RE.match(after) is None
+        ):
+            raise Exception(
+                'vtysh has not crashed in connection {}'.format(
+                    self._get_connection_name(connection)
+                )
+            )
+
+        # Connections that never started vtysh go through the whole
+        # negotiation.
+        if previous is None:
+            self._determine_set_prompt(connection)
+            return self.get_readiness(connection)
+
+        start = monotonic()
+
+        if snapshot is not None:
+            spawn.sendline('({}) > /dev/null 2>&1 &'.format(snapshot))
+            spawn.expect_list([_BASH_FORCED_PROMPT_BYTES_RE], timeout=timeout)
+
+        spawn_attempts = self._start_vtysh(
+            connection, attempts=attempts, timeout=timeout
+        )
+
+        set_prompt, set_prompt_attempts = previous.set_prompt, 0
+
+        if set_prompt:
+            set_prompt, set_prompt_attempts = self._set_prompt(
+                connection, start + timeout
+            )
+
+            if not set_prompt:
+                raise Exception(
+                    'vtysh did not accept set prompt after recovering '
+                    'connection {}'.format(
+                        self._get_connection_name(connection)
+                    )
+                )
+
+        self._record_readiness(
+            connection, VtyshReadiness(
+                set_prompt, spawn_attempts, set_prompt_attempts,
+                monotonic() - start
+            )
+        )
+
+        return self.get_readiness(connection)
+
+    def _add_prefix(self, command):
+        """
+        Add the prefix of the shell to a command, as ``send_command`` does.
+
+        :param str command: The command
+        :rtype: str
+        """
+        if self._prefix is None:
+            return command
+
+        return '{}{}'.format(self._prefix, command)
+
+    def _log_send_command(self, spawn, command, timeout):
+        """
+        Log a command that was not sent with ``send_command``, as it does.
+
+        :param spawn: The spawn of the connection
+        :param str command: The command, with the prefix of the shell
+        :param int timeout: Seconds to wait for the response
+        """
+        if self._testlog:
+            self._testlog.log_send_command(
+                self._node_identifier, self._shell_name, command, None,
+                timeout
+            )
+        else:
+            spawn._connection_logger.log_send_command(
+                command, [self._prompt], True, timeout
+            )
+
+    def send_commands(
+        self, commands, connection=None, timeout=None, silent=False
+    ):
+        """
+        Send several commands to vtysh in a single write.
+
+        All the commands are written at once, separated by newlines, and the
+        combined output is split back into the response of each command using
+        the forced vtysh prompt as a delimiter. This avoids a round trip per
+        command when pushing large configurations.
+
+        If vtysh did not accept the ``set prompt`` command in this connection,
+        the prompt can not be used as a safe delimiter and the commands are
+        sent one by one with ``send_command``. In both cases the commands get
+        the prefix of the shell and are logged as ``send_command`` does.
+
+        :param commands: An iterable of commands
+        :param str connection: Name of the connection to use
+        :param int timeout: Seconds to wait for the response of each command,
+         the timeout of the shell if not given
+        :param bool silent: True to not log the responses
+        :rtype: list
+        :return: The response of each command
+        """
+        commands = list(commands)
+        responses = []
+
+        if not commands:
+            return responses
+
+        readiness = self.get_readiness(connection)
+
+        if readiness is None or not readiness.set_prompt:
+            for command in commands:
+                self.send_command(
+                    command, timeout=timeout, connection=connection,
+                    silent=silent
+                )
+                responses.append(
+                    self.get_response(connection=connection, silent=silent)
+                )
+            return responses
+
+        spawn = self._get_connection(connection)
+
+        # The timeout of the shell is used if none is given, as
+        # send_command does
+        if timeout is None:
+            timeout = self._timeout
+
+        # The prefix is added to every command, as send_command does
+        lines = [self._add_prefix(command) for command in commands]
+
+        sent = time()
+        start = monotonic()
+
+        spawn.send(
+            spawn.linesep.join(
+                line.encode(self._encoding) for line in lines
+            ) + spawn.linesep
+        )
+
+        if not silent:
+            for line in lines:
+                self._log_send_command(spawn, line, timeout)
+
+        for command, line in zip(commands, lines):
+            # The last command is set for each response so the shell can
+            # remove its echo and report it if vtysh crashes.
+            self._last_command = line
+
+            index = spawn.expect_list(_BATCH_MATCHES, timeout=timeout)
+
+            # The responses arrive one after another, so the time of each one
+            # is measured from the previous one.
+            if self._instrumentation is not None:
+                end = monotonic()
+                self._instrumentation.record_response(
+                    self, connection, command, sent, None, end - start,
+                    len(spawn.before) + len(spawn.after), index, index == 1
+                )
+                start = end
+
+            # vtysh exited, the output until the bash prompt is checked for
+            # a known crash.
+            if index == 1:
+                self._handle_crash(connection)
+
+                raise Exception(
+                    'vtysh exited when executing "{}", {} of {} commands '
+                    'were executed'.format(
+                        line, len(responses), len(commands)
+                    )
+                )
+
+            responses.append(
+                self.get_response(connection=connection, silent=silent)
+            )
+
+        return responses
+
+    def wait_until(
+        self, command, predicate, parser=None, timeout=60,
+        initial_interval=0.5, max_interval=5, connection=None
+    ):
+        """
+        Poll a command until its output satisfies a condition.
+
+        The output of each poll is compared by digest with the previous one.
+        Outputs that did not change are not parsed or checked again, and the
+        interval between polls doubles up to ``max_interval``. When the output
+        changes the state is converging, so the interval goes back to
+        ``initial_interval``.
+
+        ::
+
+            shell.wait_until(
+                'show vlan', lambda vlans: vlans['2']['status'] == 'up',
+                parser=lambda output: parse('show vlan', output)
+            )
+
+        :param str command: The command to poll
+        :param predicate: Function that receives the parsed output and returns
+         True when the condition is met
+        :param parser: Function that receives the output and returns the value
+         passed to the predicate, the output itself is passed if not given
+        :param float timeout: Seconds to wait for the condition
+        :param float initial_interval: Initial seconds between polls
+        :param float max_interval: Maximum seconds between polls
+        :param str connection: Name of the connection to use
+        :rtype: WaitResult
+        :return: The value that met the condition and the polling metrics
+        :raises WaitTimeoutError: If the condition is not met in time
+        """
+        start = monotonic()
+        deadline = start + timeout
+        interval = initial_interval
+
+        last_digest = None
+        value = None
+        polls = 0
+        parses = 0
+
+        while True:
+            polls += 1
+
+            self.send_command(command, connection=connection, silent=True)
+            output = self.get_response(connection=connection, silent=True)
+
+            current_digest = digest(output)
+
+            if current_digest != last_digest:
+                last_digest = current_digest
+                value = output if parser is None else parser(output)
+                parses += 1
+
+                if predicate(value):
+                    return WaitResult(
+                        value, polls, parses, monotonic() - start
+                    )
+
+                interval = initial_interval
 
             else:
-                # Since it is not possible to know beforehand if the image
-                # loaded in the node includes the "set prompt" command, an
-                # attempt to match any of the following prompts is done. If the
-                # command does not exist, the shell will return an standard
-                # prompt after showing an error message.
-                return bool(index)
+                interval = min(interval * 2, max_interval)
+
+            remaining = deadline - monotonic()
+
+            if remaining <= 0:
+                raise WaitTimeoutError(
+                    command, WaitResult(
+                        value, polls, parses, monotonic() - start
+                    )
+                )
+
+            sleep(min(interval, remaining))
+
+    def stream_command(
+        self, command, connection=None, timeout=None, silent=False
+    ):
+        """
+        Send a command to vtysh and yield its output line by line.
+
+        The output is read and decoded incrementally as it arrives, so large
+        responses like the one of ``show running-config`` are never held in
+        memory at once. Lines are yielded without their line endings and
+        without the echo of the command, until the vtysh prompt is found.
+
+        Crash messages are searched for in each line. If vtysh exits, the
+        error of the crash is raised, or a generic exception if the crash is
+        unknown.
+
+        The prompt is only a safe delimiter if vtysh accepted the ``set
+        prompt`` command in this connection. The generator must be consumed
+        entirely before sending another command to the connection.
+
+        :param str command: The command to send
+        :param str connection: Name of the connection to use
+        :param int timeout: Seconds to wait for each chunk of output, the
+         timeout of the shell if not given
+        :param bool silent: True to not log the command
+        :rtype: generator
+        :return: The decoded lines of the response
+        """
+        spawn = self._get_connection(connection)
 
-        return False
+        if timeout is None:
+            timeout = self._timeout
+        readiness = self.get_readiness(connection)
+
+        if readiness is not None and readiness.set_prompt:
+            prompt_re = VTYSH_FORCED_PROMPT_RE
+        else:
+            prompt_re = VTYSH_STANDARD_PROMPT_RE
+
+        decoder = self._get_decoder(connection)
+        decoder.reset()
+
+        # The prefix is added to the command, as send_command does, and the
+        # echo is compared with the prefixed command.
+        line = self._add_prefix(command)
+
+        self._last_command = line
+        sent = time()
+        start = monotonic()
+        spawn.sendline(line)
+
+        if not silent:
+            self._log_send_command(spawn, line, timeout)
+
+        # Output already read by pexpect is processed before reading more
+        data = spawn.buffer
+        spawn.buffer = b''
+
+        pending = ''
+        echo = True
+        crash = None
+
+        first_byte = None
+        bytes_received = 0
+        index = None
+
+        try:
+            while True:
+                if data and first_byte is None:
+                    first_byte = monotonic() - start
+
+                bytes_received += len(data)
+
+                lines = (pending + decoder.feed(data)).split('\n')
+
+                # The last element is an incomplete line, it may be the
+                # prompt
+                pending = lines.pop()
+
+                for output in lines:
+                    output = output.rstrip('\r')
+
+                    if echo:
+                        echo = False
+
+                        if output.strip() == line.strip():
+                            continue
+
+                    if crash is None:
+                        crash = _CRASH_RE.search(output)
+
+                    yield output
+
+                prompt = prompt_re.match(pending)
+
+                if prompt is not None:
+                    index = 0
+
+                    # Leave the connection as if the prompt had been expected
+                    spawn.before = b''
+                    spawn.after = prompt.group().encode(self._encoding)
+                    spawn.buffer = pending[prompt.end():].encode(
+                        self._encoding
+                    )
+                    return
+
+                bash_prompt = BASH_FORCED_PROMPT_RE.match(pending)
+
+                if bash_prompt is not None:
+                    index = 1
+
+                    # Leave the connection at the bash prompt, as
+                    # _handle_crash does, so it can be recovered
+                    spawn.before = b''
+                    spawn.after = bash_prompt.group().encode(self._encoding)
+
+                    if crash is not None:
+                        raise _CRASH_ERRORS[crash.lastgroup](line)
+
+                    raise Exception(
+                        'vtysh exited when executing "{}"'.format(line)
+                    )
+
+                data = spawn.read_nonblocking(spawn.maxread, timeout)
+
+        finally:
+            # The command is recorded even if the generator is closed before
+            # the prompt is found
+            if self._instrumentation is not None:
+                self._instrumentation.record_response(
+                    self, connection, command, sent, first_byte,
+                    None if index is None else monotonic() - start,
+                    bytes_received, index, True
+                )
 
     def _exit(self):
         """
@@ -232,36 +1110,98 @@ class VtyshShellMixin(object):
 
         This is necessary to enable the gathering of coverage information in
         the vtysh module.
+
+        If ``_exit_parallel`` is True, all the connections are exited at the
+        same time. If ``_exit_deadline`` is set, the connections that have not
+        exited after that many seconds are closed forcefully.
         """
-        for connection in self._connections.keys():
-            try:
-                # This is done to handle calls to the hostname command that
-                # change this prompt
-                self.send_command(
-                    'end', silent=True, connection=connection, matches=[
-                        _VTYSH_PROMPT_TPL.format('[-\w]+')
-                    ]
-                )
+        connections = list(self._connections.keys())
 
-                self.send_command(
-                    'exit', silent=True, connection=connection, matches=[
-                        EOF, BASH_FORCED_PROMPT
-                    ]
-                )
+        if not self._exit_parallel and self._exit_deadline is None:
+            for connection in connections:
+                self._exit_connection(connection)
+            return
+
+        executor = ThreadPoolExecutor(
+            max_workers=(len(connections) if self._exit_parallel else 1) or 1
+        )
+
+        futures = {
+            executor.submit(self._exit_connection, connection): connection
+            for connection in connections
+        }
 
+        done, not_done = wait(futures, timeout=self._exit_deadline)
+
+        for future in not_done:
+            future.cancel()
+
+        self._close_stuck_connections(
+            [futures[future] for future in not_done]
+        )
+
+        executor.shutdown(wait=False)
+
+    def _close_stuck_connections(self, connections):
+        """
+        Close forcefully the connections that did not exit before
+        ``_exit_deadline``.
+
+        :param list connections: Names of the connections
+        """
+        for connection in connections:
+            warning(
+                'Exiting the vtysh self connection {} did not finish in {} '
+                'seconds, closing it'.format(connection, self._exit_deadline)
+            )
+
+            try:
+                self._get_connection(connection).close(force=True)
             except Exception as error:
                 warning(
-                    'Exiting the vtysh self connection {} failed with this'
+                    'Closing the vtysh self connection {} failed with this'
                     ' error: {}'.format(connection, str(error))
                 )
 
+    def _exit_connection(self, connection):
+        """
+        Attempt a clean exit from vtysh in a connection.
+
+        :param str connection: The connection to exit
+        """
+        try:
+            # This is done to handle calls to the hostname command that
+            # change this prompt
+            self.send_command(
+                'end', silent=True, connection=connection,
+                matches=_END_MATCHES
+            )
+
+            self.send_command(
+                'exit', silent=True, connection=connection,
+                matches=_EXIT_MATCHES
+            )
+
+        except Exception as error:
+            warning(
+                'Exiting the vtysh self connection {} failed with this'
+                ' error: {}'.format(connection, str(error))
+            )
+
 
 __all__ = [
+    'VtyshReadiness',
+    'WaitResult',
+    'WaitTimeoutError',
     'VTYSH_FORCED_PROMPT',
     'VTYSH_STANDARD_PROMPT',
     'BASH_FORCED_PROMPT',
     'BASH_STANDARD_PROMPT',
+    'VTYSH_FORCED_PROMPT_RE',
+    'VTYSH_STANDARD_PROMPT_RE',
+    'BASH_FORCED_PROMPT_RE',
     'VtyshShellMixin',
+    'register_crash_error',
     'SegmentationFaultError',
     'IllegalInstructionErrorError',
     'AbortedError',
@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+topology_openswitch asyncio vtysh module
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from logging import warning
+from asyncio import (
+    get_running_loop, wait_for, wait, sleep, ensure_future,
+    TimeoutError as AsyncTimeoutError
+)
+
+from pexpect import EOF, TIMEOUT
+from pexpect.expect import Expecter, searcher_re
+
+from topology_openswitch.vtysh import (
+    VtyshShellMixin, _Sleep, _END_MATCHES, _EXIT_MATCHES
+)
+
+
+async def expect_async(spawn, patterns, timeout=-1):
+    """
+    Wait for one of a list of compiled patterns in the output of a spawn.
+
+    This is the coroutine counterpart of ``spawn.expect_list``. The file
+    descriptor of the spawn is watched by the running event loop, so no
+    thread is blocked while waiting. The attributes ``before``, ``after`` and
+    ``match`` of the spawn are set as ``expect_list`` does.
+
+    :param spawn: A pexpect spawn
+    :param list patterns: Compiled patterns, EOF and TIMEOUT are accepted
+    :param float timeout: Seconds to wait, the timeout of the spawn if -1,
+     forever if None
+    :rtype: int
+    :return: The index of the pattern that matched
+    """
+    if timeout == -1:
+        timeout = spawn.timeout
+
+    expecter = Expecter(spawn, searcher_re(patterns))
+
+    index = expecter.existing_data()
+
+    if index is not None:
+        return index
+
+    loop = get_running_loop()
+    future = loop.create_future()
+
+    def read():
+        if future.done():
+            return
+
+        try:
+            data = spawn.read_nonblocking(spawn.maxread, 0)
+        except TIMEOUT:
+            return
+        except EOF as error:
+            try:
+                future.set_result(expecter.eof(error))
+            except EOF as eof:
+                future.set_exception(eof)
+            return
+        except Exception as error:
+            future.set_exception(error)
+            return
+
+        try:
+            index = expecter.new_data(data)
+        except Exception as error:
+            future.set_exception(error)
+            return
+
+        if index is not None:
+            future.set_result(index)
+
+    loop.add_reader(spawn.child_fd, read)
+
+    try:
+        return await wait_for(future, timeout)
+    except AsyncTimeoutError as error:
+        return expecter.timeout(error)
+    finally:
+        loop.remove_reader(spawn.child_fd)
+
+
+class AsyncVtyshShellMixin(VtyshShellMixin):
+    """
+    Mixin for the ``vtysh`` shell with coroutines to drive it from asyncio.
+
+    The blocking methods of :class:`VtyshShellMixin` are kept, this mixin adds
+    coroutine counterparts with the ``_async`` suffix that wait for vtysh
+    using the event loop instead of blocking the thread. One event loop can
+    then start and stop vtysh in many nodes at the same time:
+
+    ::
+
+        await gather(*[
+            shell._determine_set_prompt_async(connection)
+            for shell in shells
+        ])
+    """
+
+    async def _handle_crash_async(self, connection=None):
+        """
+        Coroutine counterpart of :meth:`VtyshShellMixin._handle_crash`.
+
+        Crash detection only inspects the output already read, so this never
+        waits for the spawn.
+
+        :param str connection: The connection in which to handle a crash
+        """
+        self._handle_crash(connection)
+
+    async def _run_steps_async(self, connection, steps):
+        """
+        Coroutine counterpart of :meth:`VtyshShellMixin._run_steps`.
+
+        :param str connection: Name of the connection
+        :param steps: A generator of vtysh interaction steps
+        :return: The value returned by the generator
+        """
+        spawn = self._get_connection(connection)
+        resume, value = steps.send, None
+
+        try:
+            while True:
+                step = resume(value)
+                resume, value = steps.send, None
+
+                try:
+                    if isinstance(step, _Sleep):
+                        await sleep(step.delay)
+                    else:
+                        value = await expect_async(
+                            spawn, step.patterns, timeout=step.timeout
+                        )
+                except Exception as error:
+                    resume, value = steps.throw, error
+
+        except StopIteration as stop:
+            return stop.value
+
+    async def _determine_set_prompt_async(self, connection=None):
+        """
+        Coroutine counterpart of
+        :meth:`VtyshShellMixin._determine_set_prompt`.
+
+        :param str connection: The connection in which to start vtysh
+        :rtype: bool
+        :return: True if vtysh supports the ``set prompt`` command, False
+         otherwise.
+        """
+        return await self._run_steps_async(
+            connection, self._determine_set_prompt_steps(connection)
+        )
+
+    async def _exit_async(self):
+        """
+        Coroutine counterpart of :meth:`VtyshShellMixin._exit`.
+
+        All the connections are exited at the same time. If ``_exit_deadline``
+        is set, the connections that have not exited after that many seconds
+        are closed forcefully.
+        """
+        tasks = {
+            ensure_future(self._exit_connection_async(connection)): connection
+            for connection in self._connections.keys()
+        }
+
+        if not tasks:
+            return
+
+        done, not_done = await wait(tasks, timeout=self._exit_deadline)
+
+        for task in not_done:
+            task.cancel()
+
+        self._close_stuck_connections([tasks[task] for task in not_done])
+
+    async def _exit_connection_async(self, connection):
+        """
+        Coroutine counterpart of :meth:`VtyshShellMixin._exit_connection`.
+
+        :param str connection: The connection to exit
+        """
+        try:
+            spawn = self._get_connection(connection)
+
+            # This is done to handle calls to the hostname command that
+            # change this prompt
+            for command, matches in (
+                ('end', _END_MATCHES), ('exit', _EXIT_MATCHES)
+            ):
+                # The commands are sent as send_command does in _exit
+                self._last_command = self._add_prefix(command)
+                spawn.sendline(self._last_command)
+                await expect_async(spawn, matches)
+
+        except Exception as error:
+            warning(
+                'Exiting the vtysh self connection {} failed with this'
+                ' error: {}'.format(connection, str(error))
+            )
+
+
+__all__ = ['expect_async', 'AsyncVtyshShellMixin']
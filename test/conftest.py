@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Shared fakes of the test suite of topology_openswitch.
+
+The fake shells of the test modules subclass :class:`FakeShell`, which has
+the state and the interface of a topology PExpectShell that the vtysh
+mixins use.
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from collections import OrderedDict
+
+from topology_openswitch.vtysh import VtyshShellMixin, VTYSH_FORCED_PROMPT
+
+
+class Logger(object):
+    """
+    Logger that keeps the arguments of each logged command.
+    """
+
+    def __init__(self):
+        self.commands = []
+
+    def log_send_command(self, *args):
+        self.commands.append(args)
+
+
+class FakeSpawn(object):
+    """
+    Spawn that replays a script of ``(index, before, after)`` expect results.
+    """
+
+    linesep = b'\n'
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.sent = []
+        self.before = b''
+        self.after = b''
+        self.closed = False
+        self.timeouts = []
+        self._connection_logger = Logger()
+
+    def send(self, data):
+        self.sent.append(data)
+
+    def sendline(self, line=''):
+        self.sent.append(line)
+
+    def expect(self, patterns, timeout=-1):
+        self.timeouts.append(timeout)
+        index, self.before, self.after = self.script.pop(0)
+        return index
+
+    def expect_list(self, patterns, timeout=-1):
+        return self.expect(patterns, timeout=timeout)
+
+    def close(self, force=True):
+        self.closed = True
+
+
+class FakeShell(VtyshShellMixin):
+    """
+    Minimal shell with the interface of a topology PExpectShell.
+
+    :param connections: The spawn of each connection, by name
+    """
+
+    def __init__(self, **connections):
+        self._connections = OrderedDict(sorted(connections.items()))
+        self._default_connection = None
+        self._encoding = 'utf-8'
+        self._errors = 'ignore'
+        self._last_command = None
+        self._prefix = None
+        self._prompt = VTYSH_FORCED_PROMPT
+        self._timeout = 120
+        self._testlog = None
+        self._node_identifier = 'sw1'
+        self._shell_name = 'vtysh'
+
+    def _get_connection(self, connection=None):
+        return self._connections[self._get_connection_name(connection)]
+
+    def send_command(
+        self, command, matches=None, newline=True, timeout=None,
+        connection=None, silent=False
+    ):
+        self._last_command = command
+        spawn = self._get_connection(connection)
+        spawn.sendline(command)
+        return spawn.expect(matches, timeout=timeout)
+
+    def get_response(self, connection=None, silent=False):
+        return self._get_connection(connection).before.decode(
+            self._encoding, errors=self._errors
+        ).strip()
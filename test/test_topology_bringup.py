@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_openswitch.bringup
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from threading import Barrier
+from collections import OrderedDict
+
+from topology_openswitch.vtysh import VtyshReadiness
+from topology_openswitch.bringup import bring_up_vtysh
+
+from conftest import FakeShell
+
+
+class BarrierShell(FakeShell):
+    """
+    Shell whose connections wait for each other when connecting.
+    """
+
+    def __init__(self, barrier, failing=()):
+        super(BarrierShell, self).__init__()
+        self._barrier = barrier
+        self._failing = failing
+
+    def is_connected(self, connection=None):
+        return self._connections.get(connection, False)
+
+    def connect(self, connection=None):
+        # All the connections must be connecting at the same time for the
+        # barrier to be passed.
+        self._barrier.wait(timeout=5)
+
+        if connection in self._failing:
+            raise RuntimeError('vtysh did not start')
+
+        self._connections[connection] = True
+        self._record_readiness(connection, VtyshReadiness(True, 1, 1, 0))
+
+
+class Node(object):
+
+    def __init__(self, identifier, shells):
+        self.identifier = identifier
+        self._shells = shells
+
+    def available_shells(self):
+        return list(self._shells.keys())
+
+    def get_shell(self, shell):
+        return self._shells[shell]
+
+
+def test_bring_up_vtysh():
+    """
+    Test that all the connections of all the nodes are brought up together.
+    """
+    barrier = Barrier(4)
+
+    nodes = [
+        Node('sw1', OrderedDict([('vtysh', BarrierShell(barrier))])),
+        Node('sw2', OrderedDict([
+            ('bash', object()),
+            ('vtysh', BarrierShell(barrier, failing=('1', )))
+        ])),
+    ]
+
+    results = bring_up_vtysh(nodes, connections=['0', '1'])
+
+    assert list(results.keys()) == ['sw1', 'sw2']
+    assert [result.connection for result in results['sw2']] == ['0', '1']
+    assert results['sw1'][0].error is None
+    assert results['sw2'][0].error is None
+    assert isinstance(results['sw2'][1].error, RuntimeError)
+
+    # The readiness of every connection started concurrently is kept
+    assert results['sw1'][0].readiness.set_prompt
+    assert results['sw1'][1].readiness.set_prompt
+    assert results['sw2'][0].readiness.set_prompt
+    assert all(
+        result.shell == 'vtysh'
+        for node_results in results.values() for result in node_results
+    )
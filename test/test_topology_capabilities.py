@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_openswitch.capabilities
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from topology_openswitch.capabilities import CapabilityCache
+
+
+def test_capability_cache(tmpdir):
+    """
+    Test that capabilities are kept in memory and between runs.
+    """
+    path = str(tmpdir.join('capabilities.json'))
+
+    cache = CapabilityCache(path)
+
+    assert cache.get('openswitch:latest', 'set_prompt') is None
+
+    cache.set('openswitch:latest', 'set_prompt', False)
+
+    assert cache.get('openswitch:latest', 'set_prompt') is False
+    assert CapabilityCache(path).get(
+        'openswitch:latest', 'set_prompt'
+    ) is False
+
+    cache.clear()
+
+    assert CapabilityCache(path).get(
+        'openswitch:latest', 'set_prompt'
+    ) is None
+
+    memory = CapabilityCache()
+    memory.set('openswitch:latest', 'set_prompt', True)
+
+    assert memory.get('openswitch:latest', 'set_prompt') is True
+    assert memory.get('openswitch:0.4.0', 'set_prompt') is None
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_openswitch.instrumentation
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from json import load
+from io import BytesIO
+
+from topology_openswitch.vtysh import VtyshReadiness
+from topology_openswitch.instrumentation import VtyshInstrumentation
+
+from conftest import FakeSpawn, FakeShell
+
+
+class Spawn(object):
+
+    def __init__(self):
+        self.logfile_read = BytesIO()
+        self.before = b''
+        self.after = b'switch# '
+
+
+class Shell(FakeShell):
+
+    def __init__(self):
+        super(Shell, self).__init__(**{'0': Spawn()})
+        self._default_connection = '0'
+
+    def send_command(
+        self, command, matches=None, newline=True, timeout=None,
+        connection=None, silent=False
+    ):
+        spawn = self._get_connection(connection)
+        spawn.logfile_read.write(b'output of ' + command.encode('utf-8'))
+        self._handle_crash(connection)
+        return 0
+
+
+def test_instrumentation(tmpdir):
+    """
+    Test that the commands of an attached shell are measured.
+    """
+    shell = Shell()
+    instrumentation = VtyshInstrumentation(keep_records=True)
+    instrumentation.attach(shell)
+
+    assert shell.send_command('show version') == 0
+    shell.send_command('show version')
+    shell.send_command('show vlan')
+
+    shell._record_readiness('0', VtyshReadiness(True, 2, 3, 1.5))
+
+    # The original log of the spawn still receives the output
+    assert shell._get_connection().logfile_read.getvalue() == (
+        b'output of show versionoutput of show versionoutput of show vlan'
+    )
+
+    record = instrumentation.records[0]
+
+    assert record.node == 'sw1'
+    assert record.connection == '0'
+    assert record.bytes_received == len(b'output of show version')
+    assert record.index == 0
+    assert record.crash_checked
+    assert 0 <= record.time_to_first_byte <= record.time_to_prompt
+
+    path = str(tmpdir.join('metrics.json'))
+    instrumentation.dump(path)
+
+    with open(path) as fd:
+        metrics = load(fd)
+
+    assert metrics['nodes']['sw1']['commands'] == 3
+    assert metrics['commands']['show version']['commands'] == 2
+    assert metrics['commands']['show vlan']['time_to_prompt']['count'] == 1
+    assert sum(
+        metrics['commands']['show vlan']['time_to_prompt']['buckets'].values()
+    ) == 1
+    assert metrics['readiness'][0]['node'] == 'sw1'
+    assert metrics['readiness'][0]['set_prompt_attempts'] == 3
+
+    instrumentation.detach(shell)
+
+    assert shell.send_command.__func__ is Shell.send_command
+    assert shell._instrumentation is None
+
+
+def test_instrumentation_batch():
+    """
+    Test that each command of a batch sent by an attached shell is measured.
+    """
+    spawn = FakeSpawn([
+        (0, b'', b''),
+        (1, b'', b''),
+        (0, b'interface 1', b'switch# '),
+        (0, b'show vlan\r\nNo vlan is configured', b'switch# '),
+    ])
+    shell = FakeShell(**{'0': spawn})
+
+    assert shell._determine_set_prompt()
+
+    instrumentation = VtyshInstrumentation(keep_records=True)
+    instrumentation.attach(shell)
+
+    shell.send_commands(['interface 1', 'show vlan'])
+
+    assert [record.command for record in instrumentation.records] == [
+        'interface 1', 'show vlan'
+    ]
+
+    record = instrumentation.records[1]
+
+    assert record.node == 'sw1'
+    assert record.connection == '0'
+    assert record.bytes_received == len(
+        b'show vlan\r\nNo vlan is configuredswitch# '
+    )
+    assert record.index == 0
+    assert not record.crash_checked
+    assert record.time_to_first_byte is None
+    assert record.time_to_prompt >= 0
+
+    assert instrumentation.as_dict()['nodes']['sw1']['commands'] == 2
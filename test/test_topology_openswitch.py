@@ -22,17 +22,34 @@ Test suite for module topology_openswitch.openswitch
 from __future__ import unicode_literals, absolute_import
 from __future__ import print_function, division
 
+from gc import collect as gc_collect
+from json import loads
+from weakref import ref
 from abc import ABCMeta, abstractmethod
 
-from pytest import raises, warns
+from pytest import fixture, raises, warns
 from six import add_metaclass
 
 from topology.platforms.node import CommonNode
+from topology_openswitch import openswitch
 from topology_openswitch.openswitch import (
-    OpenSwitchBase, WrongAttributeError, DeletedAttributeError
+    OpenSwitchBase, WrongAttributeError, DeletedAttributeError,
+    AttributeUsageCollector, _MetaOpenSwitch, _find_class, _dereference,
+    _emit_lint_report
 )
 
 
+@fixture(autouse=True)
+def lint_collector(monkeypatch):
+    """
+    Gather the records of the nodes of each test in its own collector.
+    """
+    collector = AttributeUsageCollector()
+    monkeypatch.setattr(openswitch, 'LINT_COLLECTOR', collector)
+    yield collector
+    gc_collect()
+
+
 def test_wrong_attribute():
     """
     Test that the wrong attribute is found in the right classes.
@@ -40,6 +57,8 @@ def test_wrong_attribute():
 
     @add_metaclass(ABCMeta)
     class Mixer(CommonNode, OpenSwitchBase):
+        _openswitch_lint = True
+
         @abstractmethod
         def __init__(self, *args, **kwargs):
             super(Mixer, self).__init__(*args, **kwargs)
@@ -177,5 +196,486 @@ def test_wrong_attribute():
     with raises(DeletedAttributeError):
         child_0_0.child_0_0
 
+    collector = AttributeUsageCollector()
+    collector.collect([child_1_0, child_2_0, child_2_1, child_4_0])
+
+    assert collector.report() == (
+        'child_2_1 should be instantiated using class '
+        'test_topology_openswitch.Child1'
+    )
+
+    assert loads(collector.report(format='json')) == [{
+        'nodes': ['child_2_1'],
+        'class': 'test_topology_openswitch.Child2',
+        'suggested_class': 'test_topology_openswitch.Child1',
+        'attributes': []
+    }]
+
     with warns(UserWarning):
-        child_2_1.__del__()
+        collector.emit()
+
+
+def test_attribute_index():
+    """
+    Test that the attribute index is reused and rebuilt for new classes.
+    """
+
+    class IndexedNode0(CommonNode, OpenSwitchBase):
+        _class_openswitch_attributes = {
+            'indexed_0_0': 'indexed_0_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(IndexedNode0, self).__init__(identifier)
+            self._indexed_0_0 = 'indexed_0_0'
+
+        def _get_services_address(self):
+            pass
+
+    index = OpenSwitchBase._get_attribute_index()
+
+    assert OpenSwitchBase._get_attribute_index() is index
+    assert _dereference(index['indexed_0_0']) == (IndexedNode0, )
+
+    class IndexedNode1(IndexedNode0):
+        _class_openswitch_attributes = {
+            'indexed_1_0': 'indexed_1_0 doc'
+        }
+
+    new_index = OpenSwitchBase._get_attribute_index()
+
+    assert new_index is not index
+    assert _dereference(new_index['indexed_1_0']) == (IndexedNode1, )
+
+    with raises(WrongAttributeError):
+        IndexedNode0('indexed_0').indexed_1_0
+
+
+def test_get_all_subclasses():
+    """
+    Test that subclasses are found once and in creation order.
+    """
+
+    @add_metaclass(ABCMeta)
+    class Registered(CommonNode, OpenSwitchBase):
+        @abstractmethod
+        def __init__(self, *args, **kwargs):
+            super(Registered, self).__init__(*args, **kwargs)
+
+    class Registered0(Registered):
+        pass
+
+    class Registered1(Registered):
+        pass
+
+    class Registered2(Registered0, Registered1):
+        pass
+
+    subclasses = Registered._get_all_subclasses()
+
+    assert subclasses == (Registered0, Registered1, Registered2)
+    assert Registered in _MetaOpenSwitch._subclasses
+    assert Registered2._get_all_subclasses() == ()
+
+    class Registered3(Registered1):
+        pass
+
+    assert Registered1._get_all_subclasses() == (Registered2, Registered3)
+
+
+def test_attribute_record():
+    """
+    Test that reading an OpenSwitch attribute records it once.
+    """
+
+    class Recorded(CommonNode, OpenSwitchBase):
+        _openswitch_lint = True
+        _class_openswitch_attributes = {
+            'recorded_0': 'recorded_0 doc',
+            'recorded_1': 'recorded_1 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Recorded, self).__init__(identifier)
+            self._recorded_0 = 'recorded_0'
+            self._recorded_1 = 'recorded_1'
+
+        def _get_services_address(self):
+            pass
+
+    recorded = Recorded('recorded')
+
+    assert recorded.recorded_0 == 'recorded_0'
+    assert recorded.recorded_0 == 'recorded_0'
+    assert recorded._attribute_record == {'recorded_0'}
+
+    recorded.recorded_1 = 'recorded_1_1'
+
+    assert recorded._recorded_1 == 'recorded_1_1'
+    assert recorded._attribute_record == {'recorded_0'}
+
+
+def test_lint_report(lint_collector):
+    """
+    Test that the lint report is produced without collecting the nodes.
+    """
+
+    class Linted(CommonNode, OpenSwitchBase):
+        _openswitch_lint = True
+        _class_openswitch_attributes = {
+            'linted_0': 'linted_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Linted, self).__init__(identifier)
+            self._linted_0 = 'linted_0'
+
+        def _get_services_address(self):
+            pass
+
+    class LintedChild(Linted):
+        _class_openswitch_attributes = {
+            'linted_1': 'linted_1 doc'
+        }
+
+    linted = LintedChild('linted')
+
+    assert linted.linted_0 == 'linted_0'
+
+    del linted
+    gc_collect()
+
+    assert [finding['nodes'] for finding in lint_collector.analyze()] == [
+        ['linted']
+    ]
+
+    with warns(UserWarning) as record:
+        _emit_lint_report()
+
+    assert str(record[0].message) == (
+        'linted should be instantiated using class '
+        'test_topology_openswitch.Linted'
+    )
+    assert lint_collector.analyze() == []
+
+
+def test_attribute_tracking_subclass():
+    """
+    Test that a class that enables lint mode records the reads of the
+    attributes inherited from classes without lint mode.
+    """
+
+    class Unlinted(CommonNode, OpenSwitchBase):
+        _openswitch_lint = False
+        _class_openswitch_attributes = {
+            'unlinted_0': 'unlinted_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Unlinted, self).__init__(identifier)
+            self._unlinted_0 = 'unlinted_0'
+
+        def _get_services_address(self):
+            pass
+
+    class Relinted(Unlinted):
+        _openswitch_lint = True
+        _class_openswitch_attributes = {
+            'relinted_0': 'relinted_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Relinted, self).__init__(identifier)
+            self._relinted_0 = 'relinted_0'
+
+    class RelintedChild(Relinted):
+        pass
+
+    node = RelintedChild('relinted')
+
+    assert node.unlinted_0 == 'unlinted_0'
+    assert node.relinted_0 == 'relinted_0'
+    assert node._get_attribute_record() == {'unlinted_0', 'relinted_0'}
+    assert Relinted.unlinted_0.__doc__ == 'unlinted_0 doc'
+
+    collector = AttributeUsageCollector()
+    collector.collect([node])
+
+    assert collector.report() == (
+        'relinted should be instantiated using class '
+        'test_topology_openswitch.Relinted'
+    )
+
+    # The classes without lint mode are not affected
+    unlinted = Unlinted('unlinted')
+
+    assert unlinted.unlinted_0 == 'unlinted_0'
+    assert '_attribute_record' not in unlinted.__dict__
+
+
+def test_attribute_tracking_disabled():
+    """
+    Test that attribute reads are not recorded when lint mode is disabled.
+    """
+
+    class Untracked(CommonNode, OpenSwitchBase):
+        _openswitch_lint = False
+        _class_openswitch_attributes = {
+            'untracked_0': 'untracked_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Untracked, self).__init__(identifier)
+            self._untracked_0 = 'untracked_0'
+
+        def _get_services_address(self):
+            pass
+
+    class UntrackedChild(Untracked):
+        _class_openswitch_attributes = {
+            'untracked_1': 'untracked_1 doc'
+        }
+
+    untracked = UntrackedChild('untracked')
+
+    assert untracked.untracked_0 == 'untracked_0'
+    assert '_attribute_record' not in untracked.__dict__
+    assert UntrackedChild.untracked_1.__doc__ == 'untracked_1 doc'
+
+    untracked = Untracked('untracked')
+
+    del untracked.untracked_0
+
+    with raises(DeletedAttributeError):
+        untracked.untracked_0
+
+
+def test_find_class(monkeypatch):
+    """
+    Test that the highest class is found and memoized.
+    """
+    monkeypatch.setattr(openswitch, '_FOUND_CLASSES_SIZE', 2)
+
+    class Found0(CommonNode, OpenSwitchBase):
+        _class_openswitch_attributes = {
+            'found_0_0': 'found_0_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Found0, self).__init__(identifier)
+
+        def _get_services_address(self):
+            pass
+
+    class Found1(Found0):
+        _class_openswitch_attributes = {
+            'found_1_0': 'found_1_0 doc'
+        }
+
+    assert Found1._find_class({'found_0_0'}) is Found0
+    assert Found1._find_class({'found_1_0'}) is Found1
+
+    found = _MetaOpenSwitch._found_classes[Found1]
+
+    assert found[frozenset({'found_0_0'})]() is Found0
+    assert Found1._find_class({'found_0_0'}) is Found0
+    assert _find_class(Found1, frozenset({'found_1_0'})) is Found1
+
+    # The least recently used result is discarded when the memo is full
+    assert Found1._find_class({'found_0_0'}) is Found0
+    assert Found1._find_class(set()) is Found0
+
+    assert list(found.keys()) == [
+        frozenset({'found_0_0'}), frozenset()
+    ]
+
+
+def test_classes_collected():
+    """
+    Test that the caches of the OpenSwitch classes do not keep them alive.
+    """
+
+    class Collected0(CommonNode, OpenSwitchBase):
+        _class_openswitch_attributes = {
+            'collected_0_0': 'collected_0_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Collected0, self).__init__(identifier)
+
+        def _get_services_address(self):
+            pass
+
+    class Collected1(Collected0):
+        _class_openswitch_attributes = {
+            'collected_1_0': 'collected_1_0 doc'
+        }
+
+    # Fill every cache with the throwaway class
+    assert Collected0._get_all_subclasses() == (Collected1, )
+    assert Collected1._find_class({'collected_0_0'}) is Collected0
+    assert not hasattr(Collected1('collected'), 'collected_missing')
+
+    with raises(WrongAttributeError):
+        Collected0('collected').collected_1_0
+
+    collected = ref(Collected1)
+    del Collected1
+    gc_collect()
+
+    assert collected() is None
+    assert Collected0._get_all_subclasses() == ()
+    assert not any(
+        reference() is None for reference in _MetaOpenSwitch._registry
+    )
+
+
+def test_missing_attribute():
+    """
+    Test that missing attributes are remembered until a new class is created.
+    """
+
+    class Probed(CommonNode, OpenSwitchBase):
+        def __init__(self, identifier):
+            super(Probed, self).__init__(identifier)
+
+        def _get_services_address(self):
+            pass
+
+    probed = Probed('probed')
+
+    assert not hasattr(probed, 'probed_0')
+    assert getattr(probed, 'probed_0', None) is None
+
+    class Probing(Probed):
+        _class_openswitch_attributes = {
+            'probed_0': 'probed_0 doc'
+        }
+
+    with raises(WrongAttributeError):
+        probed.probed_0
+
+
+def test_wrong_attribute_message():
+    """
+    Test that the message lists every class that has the attribute.
+    """
+
+    error = WrongAttributeError(
+        'attribute', OpenSwitchBase, (WrongAttributeError, ValueError)
+    )
+
+    message = str(error)
+
+    assert message == (
+        'Attribute attribute was not found in class '
+        'topology_openswitch.openswitch.OpenSwitchBase, this attribute is '
+        'available in topology_openswitch.openswitch.WrongAttributeError, '
+        'builtins.ValueError.'
+    )
+    assert str(error) is message
+
+
+def test_compact_layout():
+    """
+    Test the compact layout of the OpenSwitch attributes.
+    """
+
+    @add_metaclass(ABCMeta)
+    class Compact(CommonNode, OpenSwitchBase):
+        _openswitch_compact = True
+        _openswitch_lint = True
+
+        @abstractmethod
+        def __init__(self, *args, **kwargs):
+            super(Compact, self).__init__(*args, **kwargs)
+
+    class Compact0(Compact):
+        _class_openswitch_attributes = {
+            'compact_0_0': 'compact_0_0 doc',
+            'compact_0_1': 'compact_0_1 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Compact0, self).__init__(identifier)
+            self._compact_0_0 = 'compact_0_0'
+            self._compact_0_1 = 'compact_0_1'
+
+        def _get_services_address(self):
+            pass
+
+    class Compact1(Compact0):
+        _class_openswitch_attributes = {
+            'compact_1_0': 'compact_1_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Compact1, self).__init__(identifier)
+            self._compact_1_0 = 'compact_1_0'
+
+    compact_0 = Compact0('compact_0')
+    compact_1 = Compact1('compact_1')
+
+    assert Compact0.__slots__ == ('_compact_0_0', '_compact_0_1')
+    assert '_compact_0_0' not in compact_0.__dict__
+    assert '_attribute_record' not in compact_0.__dict__
+    assert Compact0.compact_0_0.__doc__ == 'compact_0_0 doc'
+
+    assert compact_1.compact_0_0 == 'compact_0_0'
+    assert compact_1.compact_0_0 == 'compact_0_0'
+
+    compact_1.compact_1_0 = 'compact_1_0_1'
+
+    assert compact_1.compact_1_0 == 'compact_1_0_1'
+    assert compact_1._get_attribute_record() == {
+        'compact_0_0', 'compact_1_0'
+    }
+
+    collector = AttributeUsageCollector()
+    collector.collect([compact_1])
+
+    assert collector.analyze() == []
+
+    with raises(WrongAttributeError):
+        compact_0.compact_1_0
+
+    del compact_0.compact_0_1
+
+    with raises(DeletedAttributeError):
+        compact_0.compact_0_1
+
+    with raises(TypeError):
+
+        class NotCompact(Compact0):
+            _openswitch_compact = False
+
+    class Compact2(Compact):
+        _class_openswitch_attributes = {
+            'compact_2_0': 'compact_2_0 doc'
+        }
+
+        def __init__(self, identifier):
+            super(Compact2, self).__init__(identifier)
+            self._compact_2_0 = 'compact_2_0'
+
+        def _get_services_address(self):
+            pass
+
+    with raises(TypeError) as error:
+
+        class Diamond(Compact1, Compact2):
+            pass
+
+    assert str(error.value).startswith(
+        'Class Diamond can not combine the compact layouts of classes '
+        'Compact1, Compact2'
+    )
+
+    # A base that adds no attributes shares the layout of its own base
+    class Side(Compact0):
+        pass
+
+    class Joined(Compact1, Side):
+        pass
+
+    assert Joined('joined').compact_1_0 == 'compact_1_0'
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_openswitch.parsers
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from pytest import raises
+
+from topology_openswitch.parsers import parse, get_template, Field
+
+SHOW_VERSION = '''\
+OpenSwitch 0.4.0 (Build: genericx86-64-ops-0.4.0-master+2016061715)
+Build Date      : 2016-06-17 15:14:57 UTC
+Build ID        : ops-0.4.0-master+2016061715
+Build SHA       : 1b0ef6fbd6e7bd8ce8b4e3e7ac7c7d6dc8d8f2b4
+Active Image    : primary
+'''
+
+SHOW_INTERFACE = '''\
+Interface 1 is down (Administratively down)
+ Admin state is down
+ State information: admin_down
+ Hardware: Ethernet, MAC Address: 70:72:cf:fd:e9:b9
+ MTU 1500
+ Full-duplex
+ Speed 1000 Mb/s
+ Auto-Negotiation is turned on
+ Input flow-control is off, output flow-control is off
+ RX
+            10 input packets              1200 bytes
+            0 input error                0 dropped
+            0 CRC/FCS
+ TX
+            20 output packets             2400 bytes
+            0 input error                0 dropped
+            0 collision
+'''
+
+SHOW_VLAN = '''\
+--------------------------------------------------------------------------------------
+VLAN    Name            Status   Reason         Reserved       Interface
+--------------------------------------------------------------------------------------
+1       DEFAULT_VLAN_1  up       ok                            7, 3
+2       vlan2           down     admin_down
+'''
+
+
+def test_parse():
+    """
+    Test the parsing of the output of the show commands.
+    """
+    version = parse('show version', SHOW_VERSION)
+
+    assert version['version'] == '0.4.0'
+    assert version['build'] == 'genericx86-64-ops-0.4.0-master+2016061715'
+    assert version['build_date'] == '2016-06-17 15:14:57 UTC'
+    assert version['active_image'] == 'primary'
+
+    interface = parse('show interface  1', SHOW_INTERFACE)
+
+    assert dict(interface) == {
+        'interface': '1',
+        'interface_state': 'down',
+        'state_description': 'Administratively down',
+        'admin_state': 'down',
+        'state_information': 'admin_down',
+        'mac_address': '70:72:cf:fd:e9:b9',
+        'mtu': 1500,
+        'duplex': 'full',
+        'speed': 1000,
+        'autonegotiation': 'on',
+        'rx_packets': 10,
+        'rx_bytes': 1200,
+        'tx_packets': 20,
+        'tx_bytes': 2400,
+    }
+
+    vlans = parse('show vlan', SHOW_VLAN)
+
+    assert list(vlans.keys()) == ['1', '2']
+    assert vlans['1'] == {
+        'name': 'DEFAULT_VLAN_1', 'status': 'up', 'reason': 'ok',
+        'ports': ('7', '3')
+    }
+    assert vlans['2']['ports'] is None
+
+    # The rows of a result shared through the cache can not be changed
+    with raises(TypeError):
+        vlans['1']['status'] = 'down'
+
+    assert parse('show vlan', SHOW_VLAN)['1']['status'] == 'up'
+
+    with raises(KeyError):
+        get_template('show running-config')
+
+
+def test_parse_lazy():
+    """
+    Test that lazy results extract fields when accessed and are cached.
+    """
+    output = SHOW_VERSION.replace('0.4.0', '0.5.0')
+    lazy = parse('show version', output, lazy=True)
+
+    assert not lazy._values
+    assert lazy['version'] == '0.5.0'
+    assert list(lazy._values) == ['version']
+
+    # The same output returns the same result, already parsed
+    result = parse('show version', output)
+
+    assert result is lazy
+    assert len(result._values) == len(get_template('show version').fields)
+    assert parse('show version', SHOW_VERSION) is not result
+
+
+def test_field():
+    """
+    Test the conversion and default of fields.
+    """
+    field = Field(r'^MTU\s+(\d+)', int, default=0)
+
+    assert field.extract('MTU 9000') == 9000
+    assert field.extract('') == 0
@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_openswitch.pool
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from pytest import raises
+
+from topology_openswitch.vtysh import (
+    SegmentationFaultError, BASH_FORCED_PROMPT
+)
+from topology_openswitch.pool import VtyshSessionPool
+
+from conftest import FakeShell
+
+
+class Session(object):
+
+    def __init__(self):
+        self.before = b''
+        self.after = b'switch# '
+
+
+class PoolShell(FakeShell):
+    """
+    Shell whose connections can be crashed on purpose.
+    """
+
+    def __init__(self):
+        super(PoolShell, self).__init__()
+        self.connects = []
+
+    def is_connected(self, connection=None):
+        return connection in self._connections
+
+    def connect(self, connection=None):
+        self.connects.append(connection)
+        self._connections[connection] = Session()
+
+    def disconnect(self, connection=None):
+        del self._connections[connection]
+
+    def send_command(
+        self, command, matches=None, newline=True, timeout=None,
+        connection=None, silent=False
+    ):
+        self._last_command = command
+
+    def crash(self, connection):
+        session = self._connections[connection]
+        session.before = b'Segmentation fault'
+        session.after = BASH_FORCED_PROMPT.encode('utf-8')
+
+
+def test_session_pool():
+    """
+    Test that sessions are handed out and crashed ones are replaced.
+    """
+    shell = PoolShell()
+
+    with VtyshSessionPool(shell, size=2) as pool:
+        assert sorted(shell.connects) == ['pool0', 'pool1']
+
+        first = pool.acquire()
+        second = pool.acquire()
+
+        assert {first, second} == {'pool0', 'pool1'}
+
+        with raises(Exception):
+            pool.acquire(timeout=0.01)
+
+        pool.release(first)
+        shell.crash(second)
+        pool.release(second)
+
+        # The crashed session fails the health check and is replaced
+        assert pool.acquire(timeout=1) == first
+        assert pool.acquire(timeout=1) == second
+        assert shell.connects.count(second) == 2
+        assert shell._connections[second].after == b'switch# '
+
+        pool.release(first)
+
+        with raises(SegmentationFaultError):
+            with pool.session(timeout=1) as connection:
+                assert connection == first
+                raise SegmentationFaultError('show version')
+
+        pool.wait()
+
+        assert shell.connects.count(first) == 2
+
+    assert not shell._connections
@@ -22,9 +22,524 @@ Test suite for module topology_openswitch.vtysh
 from __future__ import unicode_literals, absolute_import
 from __future__ import print_function, division
 
+from threading import Event
+from collections import OrderedDict
+
+from pytest import raises
+from pexpect import EOF, TIMEOUT
+
+from topology_openswitch import vtysh
+from topology_openswitch.capabilities import CapabilityCache
+from topology_openswitch.instrumentation import VtyshInstrumentation
+
+from conftest import Logger, FakeSpawn, FakeShell
+
+
+class StreamSpawn(FakeSpawn):
+    """
+    Spawn that returns a list of chunks of output when read.
+    """
+
+    maxread = 2000
+
+    def __init__(self, chunks, buffer=b''):
+        super(StreamSpawn, self).__init__([])
+        self.chunks = list(chunks)
+        self.buffer = buffer
+
+    def read_nonblocking(self, size=1, timeout=-1):
+        self.timeouts.append(timeout)
+        return self.chunks.pop(0)
+
 
 def test_vtysh():
     """
     FIXME: document this.
     """
     pass
+
+
+def test_prompt_matches():
+    """
+    Test that the precompiled prompt patterns match the vtysh prompts.
+    """
+    standard, forced = vtysh._SET_PROMPT_MATCHES
+
+    assert standard.search(b'\r\nswitch(config-if)# ')
+    assert not standard.search(b'\r\nroot@switch:~# ')
+    assert forced.search(
+        '{}# '.format(vtysh._VTYSH_FORCED).encode('utf-8')
+    )
+    assert vtysh._EXIT_MATCHES[0] is EOF
+    assert vtysh.BASH_FORCED_PROMPT_RE.match(vtysh.BASH_FORCED_PROMPT)
+
+
+def test_output_decoder():
+    """
+    Test the incremental and complete decoding of output.
+    """
+    decoder = vtysh._OutputDecoder()
+
+    assert decoder.feed(b'sw\xc3') == 'sw'
+    assert decoder.feed(bytearray(b'\xb1 ')) == '\xf1 '
+
+    decoder.feed(b'\xc3')
+    decoder.reset()
+    assert decoder.feed(b'a') == 'a'
+
+    assert decoder.decode(b'Segmentation fault') == 'Segmentation fault'
+    assert decoder.decode(bytearray(b'sw\xc3\xb1')) == 'sw\xf1'
+    assert decoder.decode(b'') == ''
+
+
+def test_handle_crash():
+    """
+    Test that crashes are detected only after a forced bash prompt.
+    """
+    bash_prompt = vtysh.BASH_FORCED_PROMPT.encode('utf-8')
+
+    spawn = FakeSpawn([])
+    shell = FakeShell(**{'0': spawn})
+    shell._last_command = 'show running-config'
+
+    spawn.before = b'Segmentation fault (core dumped)'
+    spawn.after = b'switch# '
+    shell._handle_crash()
+
+    spawn.after = EOF
+    shell._handle_crash()
+
+    spawn.after = bash_prompt
+    with raises(vtysh.SegmentationFaultError) as error:
+        shell._handle_crash()
+
+    assert str(error.value) == (
+        'Segmentation fault received when executing "show running-config"'
+    )
+
+    spawn.before = b'exit'
+    shell._handle_crash()
+
+
+def test_register_crash_error(monkeypatch):
+    """
+    Test that new crash messages can be registered.
+    """
+    monkeypatch.setattr(
+        vtysh, '_CRASH_ERRORS', OrderedDict(vtysh._CRASH_ERRORS)
+    )
+    monkeypatch.setattr(vtysh, '_CRASH_RE', vtysh._CRASH_RE)
+
+    @vtysh.register_crash_error
+    class BusError(vtysh._VtyshError):
+        _crash_message = 'Bus error'
+
+    spawn = FakeSpawn([])
+    spawn.before = b'Bus error'
+    spawn.after = vtysh.BASH_FORCED_PROMPT.encode('utf-8')
+
+    with raises(BusError):
+        FakeShell(**{'0': spawn})._handle_crash()
+
+    spawn.before = b'Aborted'
+
+    with raises(vtysh.AbortedError):
+        FakeShell(**{'0': spawn})._handle_crash()
+
+
+def test_determine_set_prompt(monkeypatch):
+    """
+    Test that set prompt is retried with backoff until it is accepted.
+    """
+    delays = []
+    monkeypatch.setattr(vtysh, 'sleep', delays.append)
+
+    spawn = FakeSpawn([
+        (1, b'vtysh: not ready', b''),
+        (0, b'', b'switch# '),
+        (0, b'', b'switch# '),
+        (0, b'', b'switch# '),
+        (1, b'', b''),
+    ])
+    shell = FakeShell(**{'0': spawn})
+
+    assert shell._determine_set_prompt()
+    assert spawn.sent == ['stdbuf -oL vtysh'] * 2 + [
+        'set prompt {}'.format(vtysh._VTYSH_FORCED)
+    ] * 3
+
+    assert len(delays) == 2
+    assert 0.25 <= delays[0] <= 0.5
+    assert 0.5 <= delays[1] <= 1
+
+    readiness = shell.get_readiness('0')
+
+    assert readiness.set_prompt
+    assert readiness.spawn_attempts == 2
+    assert readiness.set_prompt_attempts == 3
+
+
+def test_determine_set_prompt_error():
+    """
+    Test that the errors raised while waiting for vtysh reach its steps.
+    """
+
+    class FailingSpawn(FakeSpawn):
+
+        def expect(self, patterns, timeout=-1):
+            self.before = b'bash: vtysh: command not found'
+            raise TIMEOUT('vtysh did not start')
+
+    shell = FakeShell(**{'0': FailingSpawn([])})
+
+    with raises(Exception) as error:
+        shell._determine_set_prompt()
+
+    assert str(error.value) == (
+        'Unable to connect to vytsh after 10 attempts, last output received: '
+        'bash: vtysh: command not found'
+    )
+    assert isinstance(error.value.__cause__, TIMEOUT)
+
+
+def test_determine_set_prompt_deadline(monkeypatch):
+    """
+    Test that set prompt is not retried after the deadline.
+    """
+    monkeypatch.setattr(vtysh, 'sleep', lambda delay: None)
+
+    cache = CapabilityCache()
+
+    spawn = FakeSpawn([(0, b'', b'switch# '), (0, b'', b'switch# ')])
+    shell = FakeShell(**{'0': spawn})
+    shell._image_identifier = 'openswitch:0.1.0'
+    shell._capability_cache = cache
+    shell._set_prompt_deadline = 0
+
+    assert not shell._determine_set_prompt()
+    assert shell.get_readiness().set_prompt_attempts == 1
+
+    # A node that was not ready does not prove anything about its image
+    assert cache.get('openswitch:0.1.0', 'set_prompt') is None
+
+
+def test_determine_set_prompt_cache(monkeypatch):
+    """
+    Test that images known to not support set prompt are not probed.
+    """
+    monkeypatch.setattr(vtysh, 'sleep', lambda delay: None)
+
+    cache = CapabilityCache()
+
+    spawn = FakeSpawn([
+        (0, b'', b''), (0, b'set prompt\r\n% Unknown command.', b'')
+    ])
+    shell = FakeShell(**{'0': spawn})
+    shell._image_identifier = 'openswitch:0.1.0'
+    shell._capability_cache = cache
+    shell._set_prompt_deadline = 0
+
+    assert not shell._determine_set_prompt()
+    assert cache.get('openswitch:0.1.0', 'set_prompt') is False
+
+    spawn = FakeSpawn([(0, b'', b'')])
+    shell = FakeShell(**{'0': spawn})
+    shell._image_identifier = 'openswitch:0.1.0'
+    shell._capability_cache = cache
+
+    assert not shell._determine_set_prompt()
+    assert spawn.sent == ['stdbuf -oL vtysh']
+    assert shell.get_readiness().set_prompt_attempts == 0
+
+
+def test_send_commands():
+    """
+    Test that the commands are sent in a single write and their responses
+    split.
+    """
+    bash_prompt = vtysh.BASH_FORCED_PROMPT.encode('utf-8')
+
+    spawn = FakeSpawn([
+        (0, b'', b''),
+        (1, b'', b''),
+        (0, b'interface 1', b''),
+        (0, b'no shutdown', b''),
+        (0, b'show vlan\r\nNo vlan is configured', b''),
+        (1, b'show version\r\nSegmentation fault', bash_prompt),
+    ])
+    shell = FakeShell(**{'0': spawn})
+
+    assert shell._determine_set_prompt()
+
+    assert shell.send_commands(
+        ['interface 1', 'no shutdown', 'show vlan']
+    ) == ['interface 1', 'no shutdown', 'show vlan\r\nNo vlan is configured']
+    assert spawn.sent[-1] == b'interface 1\nno shutdown\nshow vlan\n'
+    assert spawn._connection_logger.commands == [
+        (command, [vtysh.VTYSH_FORCED_PROMPT], True, 120)
+        for command in ['interface 1', 'no shutdown', 'show vlan']
+    ]
+
+    # The timeout of the shell is used for every response of the batch
+    assert spawn.timeouts[-3:] == [120, 120, 120]
+
+    with raises(vtysh.SegmentationFaultError):
+        shell.send_commands(['show version', 'show vlan'])
+
+
+def test_send_commands_prefix():
+    """
+    Test that the commands of a batch get the prefix and are logged.
+    """
+    spawn = FakeSpawn([
+        (0, b'', b''),
+        (1, b'', b''),
+        (0, b'', b''),
+        (0, b'', b''),
+        (0, b'', b''),
+    ])
+    shell = FakeShell(**{'0': spawn})
+    shell._prefix = 'do '
+    shell._testlog = Logger()
+
+    assert shell._determine_set_prompt()
+
+    shell.send_commands(['show vlan', 'show version'], timeout=5)
+
+    assert spawn.sent[-1] == b'do show vlan\ndo show version\n'
+    assert shell._last_command == 'do show version'
+    assert shell._testlog.commands == [
+        ('sw1', 'vtysh', 'do show vlan', None, 5),
+        ('sw1', 'vtysh', 'do show version', None, 5),
+    ]
+    assert spawn._connection_logger.commands == []
+
+    shell.send_commands(['show vlan'], silent=True)
+
+    assert len(shell._testlog.commands) == 2
+
+
+def test_send_commands_without_set_prompt(monkeypatch):
+    """
+    Test that the commands are sent one by one if the prompt was not set.
+    """
+    monkeypatch.setattr(vtysh, 'sleep', lambda delay: None)
+
+    spawn = FakeSpawn([
+        (0, b'', b''), (0, b'', b''), (0, b'hostname', b''), (0, b'end', b'')
+    ])
+    shell = FakeShell(**{'0': spawn})
+    shell._set_prompt_deadline = 0
+
+    assert not shell._determine_set_prompt()
+    assert shell.send_commands(['hostname', 'end']) == ['hostname', 'end']
+    assert spawn.sent[-2:] == ['hostname', 'end']
+
+
+def test_stream_command():
+    """
+    Test that the output of a command is yielded line by line.
+    """
+    prompt = '\r\n{}# '.format(vtysh._VTYSH_FORCED).encode('utf-8')
+
+    spawn = StreamSpawn(
+        [
+            b'ning-config\r\nhostname sw\xc3',
+            b'\xb1\r\n',
+            b'interface 1\r\n    no shutdown' + prompt[:10],
+            prompt[10:] + b'left',
+        ],
+        buffer=b'show run'
+    )
+    shell = FakeShell(**{'0': spawn})
+    shell._vtysh_readiness = {'0': vtysh.VtyshReadiness(True, 1, 1, 0)}
+
+    instrumentation = VtyshInstrumentation(keep_records=True)
+    instrumentation.attach(shell)
+
+    assert list(shell.stream_command('show running-config')) == [
+        'hostname sw\xf1', 'interface 1', '    no shutdown'
+    ]
+    assert spawn.sent == ['show running-config']
+    assert spawn.buffer == b'left'
+
+    record, = instrumentation.records
+
+    assert record.command == 'show running-config'
+    assert record.index == 0
+    assert record.crash_checked
+    assert record.bytes_received == len(b'show run') + sum(
+        len(chunk) for chunk in [
+            b'ning-config\r\nhostname sw\xc3', b'\xb1\r\n',
+            b'interface 1\r\n    no shutdown' + prompt[:10],
+            prompt[10:] + b'left'
+        ]
+    )
+    assert 0 <= record.time_to_first_byte <= record.time_to_prompt
+
+
+def test_stream_command_prefix():
+    """
+    Test that a streamed command gets the prefix and is logged.
+    """
+    prompt = '{}# '.format(vtysh._VTYSH_FORCED).encode('utf-8')
+
+    spawn = StreamSpawn([
+        b'do show vlan\r\nNo vlan is configured\r\n', prompt
+    ])
+    shell = FakeShell(**{'0': spawn})
+    shell._vtysh_readiness = {'0': vtysh.VtyshReadiness(True, 1, 1, 0)}
+    shell._prefix = 'do '
+
+    assert list(shell.stream_command('show vlan')) == [
+        'No vlan is configured'
+    ]
+    assert spawn.sent == ['do show vlan']
+    assert spawn.timeouts == [120, 120]
+    assert spawn._connection_logger.commands == [
+        ('do show vlan', [vtysh.VTYSH_FORCED_PROMPT], True, 120)
+    ]
+
+    spawn.chunks = [prompt]
+
+    assert list(shell.stream_command('show vlan', silent=True)) == []
+    assert len(spawn._connection_logger.commands) == 1
+
+
+def test_stream_command_crash():
+    """
+    Test that crashes are detected while streaming.
+    """
+    spawn = StreamSpawn([
+        b'show version\r\nSegmentation fault\r\n',
+        vtysh.BASH_FORCED_PROMPT.encode('utf-8')
+    ])
+    shell = FakeShell(**{'0': spawn})
+
+    lines = shell.stream_command('show version')
+
+    assert next(lines) == 'Segmentation fault'
+
+    with raises(vtysh.SegmentationFaultError):
+        next(lines)
+
+
+def test_wait_until(monkeypatch):
+    """
+    Test that unchanged outputs are not parsed again while polling.
+    """
+    delays = []
+    monkeypatch.setattr(vtysh, 'sleep', delays.append)
+
+    spawn = FakeSpawn([
+        (0, b'state: down', b''),
+        (0, b'state: down', b''),
+        (0, b'state: down', b''),
+        (0, b'state: booting', b''),
+        (0, b'state: up', b''),
+    ])
+    shell = FakeShell(**{'0': spawn})
+    parsed = []
+
+    def parser(output):
+        parsed.append(output)
+        return output.split(': ')[1]
+
+    result = shell.wait_until(
+        'show state', lambda state: state == 'up', parser=parser,
+        initial_interval=1, max_interval=3
+    )
+
+    assert result.value == 'up'
+    assert result.polls == 5
+    assert result.parses == 3
+    assert parsed == ['state: down', 'state: booting', 'state: up']
+    assert delays == [1, 2, 3, 1]
+
+
+def test_wait_until_timeout():
+    """
+    Test that an error is raised if the condition is not met in time.
+    """
+    spawn = FakeSpawn([(0, b'state: down', b'')])
+    shell = FakeShell(**{'0': spawn})
+
+    with raises(vtysh.WaitTimeoutError) as error:
+        shell.wait_until('show state', lambda output: False, timeout=0)
+
+    assert error.value.result.polls == 1
+    assert error.value.result.value == 'state: down'
+
+
+def test_recover_vtysh(monkeypatch):
+    """
+    Test that vtysh is started again in the prompt mode it had.
+    """
+    monkeypatch.setattr(vtysh, 'sleep', lambda delay: None)
+
+    bash_prompt = vtysh.BASH_FORCED_PROMPT.encode('utf-8')
+
+    spawn = FakeSpawn([
+        (0, b'', b''),
+        (1, b'', b''),
+        (0, b'', b''),
+        (1, b'', b''),
+    ])
+    shell = FakeShell(**{'0': spawn})
+
+    assert shell._determine_set_prompt()
+
+    with raises(Exception):
+        shell.recover_vtysh()
+
+    spawn.before = b'Segmentation fault'
+    spawn.after = bash_prompt
+
+    with raises(vtysh.SegmentationFaultError):
+        shell._handle_crash()
+
+    spawn.script.insert(0, (0, b'[1] 1234', bash_prompt))
+
+    readiness = shell.recover_vtysh(snapshot='tar czf /tmp/core.tgz /var/log')
+
+    assert spawn.sent[2:] == [
+        '(tar czf /tmp/core.tgz /var/log) > /dev/null 2>&1 &',
+        'stdbuf -oL vtysh',
+        'set prompt {}'.format(vtysh._VTYSH_FORCED),
+    ]
+    assert readiness == shell.get_readiness()
+    assert readiness.set_prompt
+    assert readiness.spawn_attempts == 1
+    assert readiness.set_prompt_attempts == 1
+
+
+def test_exit_parallel():
+    """
+    Test that the connections that do not exit in time are closed.
+    """
+
+    class HangingSpawn(FakeSpawn):
+
+        def __init__(self, event):
+            super(HangingSpawn, self).__init__([])
+            self.event = event
+
+        def expect(self, patterns, timeout=-1):
+            self.event.wait(5)
+            raise EOF('closed')
+
+        def close(self, force=True):
+            super(HangingSpawn, self).close(force=force)
+            self.event.set()
+
+    spawn = FakeSpawn([(0, b'', b'switch# '), (1, b'', b'')])
+    hanging = HangingSpawn(Event())
+    shell = FakeShell(**{'0': spawn, '1': hanging})
+    shell._exit_parallel = True
+    shell._exit_deadline = 0.1
+
+    shell._exit()
+
+    assert spawn.sent == ['end', 'exit']
+    assert not spawn.closed
+    assert hanging.closed
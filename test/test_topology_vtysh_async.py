@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+#
+# Copyright (C) 2016 Hewlett Packard Enterprise Development LP
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing,
+# software distributed under the License is distributed on an
+# "AS IS" BASIS, WITHOUT WARRANTIES OR CONDITIONS OF ANY
+# KIND, either express or implied.  See the License for the
+# specific language governing permissions and limitations
+# under the License.
+
+"""
+Test suite for module topology_openswitch.vtysh_async
+"""
+
+from __future__ import unicode_literals, absolute_import
+from __future__ import print_function, division
+
+from sys import executable
+from asyncio import run, gather
+
+from pexpect import spawn
+
+from topology_openswitch.vtysh_async import AsyncVtyshShellMixin
+
+from conftest import FakeShell
+
+# Minimal vtysh, started from a minimal bash, that accepts set prompt from
+# the second attempt on
+VTYSH = '''
+import sys
+vtysh = False
+prompt = 'switch'
+attempts = 0
+while True:
+    line = sys.stdin.readline().strip()
+    if not vtysh:
+        if line == 'stdbuf -oL vtysh':
+            vtysh = True
+            sys.stdout.write('switch# ')
+        elif line == 'exit':
+            break
+    elif line.startswith('set prompt '):
+        attempts += 1
+        if attempts > 1:
+            prompt = line[len('set prompt '):]
+        sys.stdout.write('{}# '.format(prompt))
+    elif line == 'exit':
+        break
+    else:
+        sys.stdout.write('{}# '.format(prompt))
+    sys.stdout.flush()
+'''
+
+
+class AsyncShell(AsyncVtyshShellMixin, FakeShell):
+
+    def __init__(self, *connections):
+        super(AsyncShell, self).__init__(**{
+            connection: spawn(executable, ['-c', VTYSH], timeout=5)
+            for connection in connections
+        })
+        self._set_prompt_initial_delay = 0.01
+
+
+def test_async_vtysh():
+    """
+    Test that vtysh is started and exited in several connections at once.
+    """
+    shell = AsyncShell('0', '1', '2')
+
+    async def bring_up():
+        return await gather(*[
+            shell._determine_set_prompt_async(connection)
+            for connection in shell._connections
+        ])
+
+    assert run(bring_up()) == [True, True, True]
+    assert all(
+        shell.get_readiness(connection).set_prompt_attempts == 2
+        for connection in shell._connections
+    )
+
+    run(shell._exit_async())
+
+    assert shell._last_command == 'exit'
+
+    for connection in shell._connections.values():
+        assert connection.wait() == 0